@@ -0,0 +1,316 @@
+#!/usr/bin/env python3
+"""
+Writes synthetic but valid APK files (binary AXML + resources.arsc) for the decoding benchmarks.
+"""
+from .manifestGenerator import buildManifest, ANDROID_NS
+import argparse
+import random
+import struct
+import xml.etree.ElementTree as ET
+import zipfile
+
+PACKAGE_ID = 0x7F
+
+RES_STRING_POOL_TYPE = 0x0001
+RES_TABLE_TYPE = 0x0002
+RES_XML_TYPE = 0x0003
+RES_XML_START_NAMESPACE_TYPE = 0x0100
+RES_XML_END_NAMESPACE_TYPE = 0x0101
+RES_XML_START_ELEMENT_TYPE = 0x0102
+RES_XML_END_ELEMENT_TYPE = 0x0103
+RES_XML_CDATA_TYPE = 0x0104
+RES_XML_RESOURCE_MAP_TYPE = 0x0180
+RES_TABLE_PACKAGE_TYPE = 0x0200
+RES_TABLE_TYPE_TYPE = 0x0201
+RES_TABLE_TYPE_SPEC_TYPE = 0x0202
+
+TYPE_REFERENCE = 0x01
+TYPE_STRING = 0x03
+TYPE_INT_DEC = 0x10
+TYPE_INT_HEX = 0x11
+TYPE_INT_BOOLEAN = 0x12
+
+UTF8_FLAG = 1 << 8
+NO_INDEX = 0xFFFFFFFF
+
+
+def _chunk(chunkType, header, body=b""):
+    """
+    Wraps a header and a body into a ResChunk_header.
+    """
+    return struct.pack("<HHL", chunkType, 8 + len(header), 8 + len(header) + len(body)) + header + body
+
+
+def _encodeLength(length, sizeofChar):
+    if sizeofChar == 1:
+        if length > 0x7F:
+            return struct.pack(">H", length | 0x8000)
+        return struct.pack("<B", length)
+    if length > 0x7FFF:
+        return struct.pack("<HH", (length >> 16) | 0x8000, length & 0xFFFF)
+    return struct.pack("<H", length)
+
+
+def stringPool(strings, utf8=False):
+    """
+    Serializes a ResStringPool chunk.
+    """
+    data = bytearray()
+    offsets = []
+    for s in strings:
+        offsets.append(len(data))
+        if utf8:
+            encoded = s.encode("utf-8")
+            data += _encodeLength(len(s), 1) + _encodeLength(len(encoded), 1) + encoded + b"\x00"
+        else:
+            encoded = s.encode("utf-16-le")
+            data += _encodeLength(len(encoded) // 2, 2) + encoded + b"\x00\x00"
+    data += b"\x00" * (-len(data) % 4)
+    stringsStart = 28 + 4 * len(strings)
+    header = struct.pack("<LLLLL", len(strings), 0, UTF8_FLAG if utf8 else 0, stringsStart, 0)
+    return _chunk(RES_STRING_POOL_TYPE, header, struct.pack(f"<{len(offsets)}L", *offsets) + bytes(data))
+
+
+class ResourceTable:
+    """
+    Collects (type, name, value) entries and assigns them 0x7FTTEEEE resource ids.
+    """
+
+    def __init__(self, packageName):
+        self.packageName = packageName
+        # type -> list of (name, value)
+        self.types = {}
+        # type -> type id, and (type, name) -> entry id of the first entry with this name
+        self.typeIds = {}
+        self.entryIds = {}
+
+    def add(self, resType, name, value):
+        entries = self.types.setdefault(resType, [])
+        self.typeIds.setdefault(resType, len(self.typeIds) + 1)
+        self.entryIds.setdefault((resType, name), len(entries))
+        entries.append((name, value))
+        return self.rid(resType, name)
+
+    def rid(self, resType, name):
+        return (PACKAGE_ID << 24) | (self.typeIds[resType] << 16) | self.entryIds[resType, name]
+
+    def toBytes(self):
+        values = []
+        keys = []
+        body = bytearray()
+        for typeId, (resType, entries) in enumerate(self.types.items(), start=1):
+            spec = struct.pack("<BBHL", typeId, 0, 0, len(entries))
+            body += _chunk(RES_TABLE_TYPE_SPEC_TYPE, spec, struct.pack(f"<{len(entries)}L", *[0] * len(entries)))
+            offsets = []
+            data = bytearray()
+            for name, value in entries:
+                offsets.append(len(data))
+                keys.append(name)
+                values.append(value)
+                data += struct.pack("<HHL", 8, 0, len(keys) - 1)
+                data += struct.pack("<HBBL", 8, 0, TYPE_STRING, len(values) - 1)
+            # default configuration, 64 bytes of zeroes except for its size
+            config = struct.pack("<L", 64) + b"\x00" * 60
+            header = struct.pack("<BBHLL", typeId, 0, 0, len(entries), 8 + 12 + len(config) + 4 * len(entries))
+            body += _chunk(RES_TABLE_TYPE_TYPE, header + config,
+                           struct.pack(f"<{len(offsets)}L", *offsets) + bytes(data))
+
+        typeStrings = stringPool(list(self.types), utf8=True)
+        keyStrings = stringPool(keys, utf8=True)
+        name = self.packageName.encode("utf-16-le")[:254].ljust(256, b"\x00")
+        headerSize = 8 + 4 + 256 + 16
+        pkgHeader = struct.pack("<L", PACKAGE_ID) + name + struct.pack(
+            "<LLLL", headerSize, len(self.types), headerSize + len(typeStrings), len(keys))
+        package = _chunk(RES_TABLE_PACKAGE_TYPE, pkgHeader, typeStrings + keyStrings + bytes(body))
+        return _chunk(RES_TABLE_TYPE, struct.pack("<L", 1), stringPool(values, utf8=True) + package)
+
+
+class AXMLWriter:
+    """
+    Serializes an ElementTree element into binary AXML, the way aapt does for compiled XML files.
+    """
+
+    def __init__(self, table=None):
+        self.table = table
+        self.strings = []
+        self.index = {}
+
+    def _str(self, s):
+        if s is None:
+            return NO_INDEX
+        if s not in self.index:
+            self.index[s] = len(self.strings)
+            self.strings.append(s)
+        return self.index[s]
+
+    def _value(self, value):
+        """
+        Infers the typed value aapt would have produced for an attribute.
+        """
+        if value.startswith("@") and "/" in value and self.table is not None:
+            resType, name = value[1:].split("/", 1)
+            return NO_INDEX, TYPE_REFERENCE, self.table.rid(resType, name)
+        if value in ("true", "false"):
+            return NO_INDEX, TYPE_INT_BOOLEAN, 0xFFFFFFFF if value == "true" else 0
+        if value.startswith("0x"):
+            return NO_INDEX, TYPE_INT_HEX, int(value, 16)
+        if value.isdigit():
+            return NO_INDEX, TYPE_INT_DEC, int(value)
+        idx = self._str(value)
+        return idx, TYPE_STRING, idx
+
+    @staticmethod
+    def _split(tag):
+        if tag.startswith("{"):
+            ns, name = tag[1:].split("}", 1)
+            return ns, name
+        return None, tag
+
+    def _element(self, elm, out):
+        ns, name = self._split(elm.tag)
+        attrs = []
+        for key, value in elm.attrib.items():
+            ans, aname = self._split(key)
+            raw, vtype, data = self._value(value)
+            attrs.append(struct.pack("<LLLHBBL", self._str(ans), self._str(aname), raw, 8, 0, vtype, data))
+        header = struct.pack("<LL", 1, NO_INDEX)
+        body = struct.pack("<LLHHHHHH", self._str(ns), self._str(name), 20, 20, len(attrs), 0, 0, 0)
+        out.append(_chunk(RES_XML_START_ELEMENT_TYPE, header, body + b"".join(attrs)))
+        if elm.text and elm.text.strip():
+            out.append(_chunk(RES_XML_CDATA_TYPE, header,
+                              struct.pack("<LHBBL", self._str(elm.text.strip()), 8, 0, 0, 0)))
+        for child in elm:
+            self._element(child, out)
+        out.append(_chunk(RES_XML_END_ELEMENT_TYPE, header, struct.pack("<LL", self._str(ns), self._str(name))))
+
+    def toBytes(self, root, namespaces=None):
+        namespaces = namespaces or {"android": ANDROID_NS}
+        out = []
+        nsChunks = []
+        for prefix, uri in namespaces.items():
+            nsChunks.append(struct.pack("<LL", self._str(prefix), self._str(uri)))
+        header = struct.pack("<LL", 1, NO_INDEX)
+        self._element(root, out)
+        body = b"".join(_chunk(RES_XML_START_NAMESPACE_TYPE, header, c) for c in nsChunks)
+        body += b"".join(out)
+        body += b"".join(_chunk(RES_XML_END_NAMESPACE_TYPE, header, c) for c in reversed(nsChunks))
+        return _chunk(RES_XML_TYPE, b"", stringPool(self.strings) + body)
+
+
+def _android(name):
+    return f"{{{ANDROID_NS}}}{name}"
+
+
+# aapt compiles these attributes to integers
+PROTECTION_LEVELS = {"normal": "0x00000000", "dangerous": "0x00000001", "signature": "0x00000002",
+                     "signatureOrSystem": "0x00000003"}
+LAUNCH_MODES = {"standard": "0", "singleTop": "1", "singleTask": "2", "singleInstance": "3"}
+
+
+def _compileManifest(root):
+    """
+    Replaces the enum values of the manifest with their integer value, like aapt does.
+    """
+    for perm in root.iter("permission"):
+        level = perm.get(_android("protectionLevel"))
+        if level in PROTECTION_LEVELS:
+            perm.set(_android("protectionLevel"), PROTECTION_LEVELS[level])
+    for activity in root.iter("activity"):
+        mode = activity.get(_android("launchMode"))
+        if mode in LAUNCH_MODES:
+            activity.set(_android("launchMode"), LAUNCH_MODES[mode])
+    return root
+
+
+def buildNetworkSecurityConfig():
+    root = ET.Element("network-security-config")
+    base = ET.SubElement(root, "base-config", {"cleartextTrafficPermitted": "false"})
+    ta = ET.SubElement(base, "trust-anchors")
+    ET.SubElement(ta, "certificates", {"src": "system"})
+    dc = ET.SubElement(root, "domain-config", {"cleartextTrafficPermitted": "true"})
+    d = ET.SubElement(dc, "domain", {"includeSubdomains": "true"})
+    d.text = "example.com"
+    ps = ET.SubElement(dc, "pin-set", {"expiration": "2030-01-01"})
+    pin = ET.SubElement(ps, "pin", {"digest": "SHA-256"})
+    pin.text = "7HIpactkIAq2Y49orFOOQKurWxmmSFZhBCoQYcRhJ3Y="
+    return root
+
+
+def buildBackupRules():
+    root = ET.Element("full-backup-content")
+    ET.SubElement(root, "include", {"domain": "sharedpref", "path": "."})
+    ET.SubElement(root, "exclude", {"domain": "sharedpref", "path": "device.xml"})
+    return root
+
+
+def buildDataExtractionRules():
+    root = ET.Element("data-extraction-rules")
+    cb = ET.SubElement(root, "cloud-backup", {"disableIfNoEncryptionCapabilities": "true"})
+    ET.SubElement(cb, "include", {"domain": "file", "path": "."})
+    dt = ET.SubElement(root, "device-transfer")
+    ET.SubElement(dt, "exclude", {"domain": "database", "path": "."})
+    return root
+
+
+def generateAPK(path, components=100, strings=1000, package="com.example.synthetic", obfuscate=True,
+                assetSize=0, seed=0):
+    """
+    Writes a synthetic APK to path.
+    The manifest is the one of manifestGenerator, with its application referencing a network security config,
+    backup rules and data extraction rules through the resource table.
+
+    :param components: the number of components declared in the manifest
+    :param strings: the number of string resources in resources.arsc
+    :param obfuscate: if True the XML resources get short obfuscated ZIP paths (ex: res/a0.xml)
+    :param assetSize: size in bytes of an uncompressed asset to add (simulates bundled models)
+    """
+    table = ResourceTable(package)
+    table.add("string", "app_name", "Synthetic")
+    rnd = random.Random(seed)
+    for i in range(strings):
+        if i % 97 == 0:
+            value = f"https://synthetic-{i}.firebaseio.com"
+        else:
+            value = "".join(rnd.choice("abcdefghijklmnopqrstuvwxyz ") for _ in range(24))
+        table.add("string", f"s{i}", value)
+
+    xmlFiles = {
+        "network_security_config": buildNetworkSecurityConfig(),
+        "backup_rules": buildBackupRules(),
+        "data_extraction_rules": buildDataExtractionRules(),
+    }
+    zipPaths = {}
+    for i, name in enumerate(xmlFiles):
+        zipPaths[name] = f"res/a{i}.xml" if obfuscate else f"res/xml/{name}.xml"
+        table.add("xml", name, zipPaths[name])
+
+    manifest = _compileManifest(buildManifest(components, package, seed=seed))
+    manifest.find("application").attrib.update({
+        _android("label"): "@string/app_name",
+        _android("networkSecurityConfig"): "@xml/network_security_config",
+        _android("fullBackupContent"): "@xml/backup_rules",
+        _android("dataExtractionRules"): "@xml/data_extraction_rules",
+    })
+    with zipfile.ZipFile(path, "w", zipfile.ZIP_DEFLATED) as z:
+        z.writestr("AndroidManifest.xml", AXMLWriter(table).toBytes(manifest))
+        # resources.arsc is always stored uncompressed in real APKs
+        z.writestr(zipfile.ZipInfo("resources.arsc"), table.toBytes(), zipfile.ZIP_STORED)
+        for name, root in xmlFiles.items():
+            z.writestr(zipPaths[name], AXMLWriter(table).toBytes(root))
+        z.writestr("classes.dex", b"dex\n035\x00" + b"\x00" * 104)
+        if assetSize:
+            z.writestr(zipfile.ZipInfo("assets/model.bin"), rnd.randbytes(assetSize), zipfile.ZIP_STORED)
+    return path
+
+
+if __name__ == "__main__":
+    argparser = argparse.ArgumentParser(description="Generates a synthetic APK file.")
+    argparser.add_argument("output", help="The path of the APK to write.")
+    argparser.add_argument("--components", "-c", type=int, default=100)
+    argparser.add_argument("--strings", "-s", type=int, default=1000, help="Number of string resources")
+    argparser.add_argument("--asset-size", type=int, default=0, help="Size in bytes of an uncompressed asset")
+    argparser.add_argument("--no-obfuscation", action="store_true", help="Keep the real paths of the XML resources")
+    argparser.add_argument("--seed", type=int, default=0)
+    args = argparser.parse_args()
+    generateAPK(args.output, args.components, args.strings, obfuscate=not args.no_obfuscation,
+                assetSize=args.asset_size, seed=args.seed)
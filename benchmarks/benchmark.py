@@ -0,0 +1,180 @@
+#!/usr/bin/env python3
+"""
+Times the parsing of synthetic manifests and each check of the analysis, for growing numbers of components.
+With --apk, synthetic APK files are decoded instead, and the decoding of the resource table and its memory
+are measured too.
+Run from the root of the repository:
+    python -m benchmarks.benchmark --output results.json
+    python -m benchmarks.benchmark --output new.json --compare results.json
+    python -m benchmarks.benchmark --apk --sizes 100,1000 --output apk.json
+"""
+from src.parser import Parser
+from src.apkParser import APKParser
+from src.analyzer import Analyzer
+from src.constants import ANDROID_MAX_SDK
+from src.resultCache import toolVersion
+from .manifestGenerator import writeManifest
+from .apkGenerator import generateAPK
+from termcolor import colored
+from tabulate import tabulate
+from datetime import datetime
+import argparse
+import contextlib
+import platform
+import tempfile
+import tracemalloc
+import logging
+import json
+import time
+import sys
+import os
+
+DEFAULT_SIZES = [100, 1000, 10000, 100000]
+# changes under this duration (in seconds) are noise
+NOISE = 0.005
+
+
+def _analyzerArgs(path, only=None):
+    # same as the command line with -min 21 -target 30, without network nor cache
+    return argparse.Namespace(path=path, min_sdk_version=21, target_sdk_version=30, max_sdk_version=ANDROID_MAX_SDK,
+                              json=None, only=only, skip=None, threads=1, profile=True, no_cache=True)
+
+
+def _parse(path):
+    if path.endswith(".apk"):
+        parser = APKParser(path)
+        # decoded on first use otherwise
+        parser.resources
+        return parser
+    return Parser(path)
+
+
+def _peakMemory(path):
+    """
+    Measures the peak memory allocated to parse a file.
+    """
+    tracemalloc.start()
+    try:
+        _parse(path)
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def benchmarkSize(path, repeat=1, only=None):
+    """
+    Times the parsing of a manifest or an APK and each check of its analysis.
+    The parsing of an APK includes the decoding of its resource table, which is also measured alone.
+    The best time of the repetitions is kept.
+    """
+    res = {"parse": None, "checks": {}}
+    for _ in range(repeat):
+        start = time.perf_counter()
+        parser = _parse(path)
+        parse = time.perf_counter() - start
+        if parser.apk is not None:
+            res["resources"] = min(parser.resourcesStats["time"], res.get("resources", float("inf")))
+        analyzer = Analyzer(parser, _analyzerArgs(path, only))
+        start = time.perf_counter()
+        with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+            analyzer.runAllTests()
+        total = time.perf_counter() - start
+        checks = {name: e["time"] for name, e in analyzer.profiler.toDict()["checks"].items()}
+        if res["parse"] is None or parse < res["parse"]:
+            res["parse"] = parse
+        if "analysis" not in res or total < res["analysis"]:
+            res["analysis"] = total
+        for name, duration in checks.items():
+            res["checks"][name] = min(duration, res["checks"].get(name, duration))
+    if "resources" in res:
+        # tracemalloc slows everything down, so not during the timed runs
+        res["memory"] = _peakMemory(path)
+    return res
+
+
+def runBenchmarks(sizes, repeat=1, only=None, apk=False, stringsRatio=10):
+    """
+    Generates a manifest (or an APK with stringsRatio string resources per component) for each size
+    and benchmarks it.
+    Returns the results with the version of the tool and of Python they were obtained with.
+    """
+    results = {
+        "tool": toolVersion(),
+        "python": platform.python_version(),
+        "date": datetime.now().isoformat(timespec="seconds"),
+        "kind": "apk" if apk else "manifest",
+        "sizes": {}
+    }
+    with tempfile.TemporaryDirectory() as tmpPath:
+        for size in sizes:
+            if apk:
+                path = generateAPK(os.path.join(tmpPath, f"synthetic{size}.apk"), size, size * stringsRatio)
+            else:
+                path = writeManifest(os.path.join(tmpPath, f"AndroidManifest{size}.xml"), size)
+            res = results["sizes"][str(size)] = benchmarkSize(path, repeat, only)
+            print(f"{size} components: parsing {res['parse']:.3f}s, analysis {res['analysis']:.3f}s", file=sys.stderr)
+    return results
+
+
+def _measures(res):
+    yield "parse", res["parse"]
+    if "resources" in res:
+        yield "resources", res["resources"]
+    yield "analysis", res["analysis"]
+    for name, duration in sorted(res["checks"].items()):
+        yield name, duration
+
+
+def compare(baseline, results, threshold):
+    """
+    Displays the results next to a baseline and returns the measures slower than threshold times the baseline.
+    """
+    regressions = []
+    for size, res in results["sizes"].items():
+        base = baseline["sizes"].get(size)
+        if base is None:
+            continue
+        baseMeasures = dict(_measures(base))
+        table = []
+        for name, duration in _measures(res):
+            before = baseMeasures.get(name)
+            if before is None:
+                continue
+            ratio = duration / before if before else float("inf")
+            row = [name, f"{before * 1000:.2f}", f"{duration * 1000:.2f}", f"{ratio:.2f}"]
+            if ratio > threshold and duration - before > NOISE:
+                regressions.append((size, name, ratio))
+                row = [colored(e, "red") for e in row]
+            table.append(row)
+        print(f"\n{size} components")
+        print(tabulate(table, ["measure", "baseline (ms)", "current (ms)", "ratio"]))
+    return regressions
+
+
+if __name__ == "__main__":
+    argparser = argparse.ArgumentParser(description="Benchmarks the parser and the checks on synthetic manifests.")
+    argparser.add_argument("--sizes", type=lambda s: [int(e) for e in s.split(",")], default=DEFAULT_SIZES,
+                           help=f"Comma separated numbers of components (default : "
+                                f"{','.join(map(str, DEFAULT_SIZES))})")
+    argparser.add_argument("--repeat", "-r", type=int, default=1, help="Number of runs per size, the best one is kept")
+    argparser.add_argument("--only", type=lambda s: s.split(","), help="Only run the given checks")
+    argparser.add_argument("--apk", action="store_true", help="Benchmark synthetic APK files instead of manifests")
+    argparser.add_argument("--strings-ratio", type=int, default=10,
+                           help="With --apk, number of string resources per component (default : 10)")
+    argparser.add_argument("--output", "-o", help="The JSON file where the results are written")
+    argparser.add_argument("--compare", metavar="baseline", help="The JSON results of a previous run to compare with")
+    argparser.add_argument("--threshold", type=float, default=1.25,
+                           help="Ratio over which a measure is a regression (default : 1.25)")
+    args = argparser.parse_args()
+
+    logging.getLogger("MainLogger").setLevel(logging.CRITICAL + 1)
+    results = runBenchmarks(args.sizes, args.repeat, args.only, args.apk, args.strings_ratio)
+    if args.output is not None:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+    if args.compare is not None:
+        with open(args.compare) as f:
+            regressions = compare(json.load(f), results, args.threshold)
+        if regressions:
+            print(colored(f"\n{len(regressions)} regression(s)", "red"))
+            sys.exit(1)
@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+Measures the import time of the command line with python -X importtime, and fails when it is over budget.
+The heavy dependencies must only be imported by the code paths needing them, importing them at startup fails too.
+Run from the root of the repository:
+    python -m benchmarks.importTime
+    python -m benchmarks.importTime --output imports.json
+    python -m benchmarks.importTime --compare imports.json
+"""
+from termcolor import colored
+from tabulate import tabulate
+import subprocess
+import argparse
+import json
+import sys
+import os
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# in seconds, the cumulative import time of main.py
+DEFAULT_BUDGET = 0.2
+# only imported when an APK is decoded, app links are verified, a table is displayed or a batch is run
+LAZY_MODULES = ["pyaxmlparser", "requests", "tabulate", "multiprocessing"]
+
+
+def measureImports(module="main", repeat=5):
+    """
+    Imports a module in new interpreters and returns the import times of the fastest run:
+    {"total": seconds, "modules": {name: cumulative seconds}} where total is the cumulative time of the module.
+    """
+    best = None
+    for _ in range(repeat):
+        res = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"], cwd=ROOT,
+                             capture_output=True, text=True, check=True)
+        modules = {}
+        for line in res.stderr.splitlines():
+            # import time: self [us] | cumulative | imported package
+            fields = line[len("import time:"):].split("|")
+            if not line.startswith("import time:") or len(fields) != 3 or not fields[1].strip().isdigit():
+                continue
+            modules[fields[2].strip()] = int(fields[1]) / 1e6
+        if best is None or modules[module] < best["total"]:
+            best = {"total": modules[module], "modules": modules}
+    return best
+
+
+def eagerModules(res):
+    """
+    Returns the LAZY_MODULES which were imported.
+    """
+    return [name for name in LAZY_MODULES if name in res["modules"]]
+
+
+def show(res, top=15):
+    """
+    Displays the slowest imports.
+    """
+    table = [[name, f"{duration * 1000:.2f}"]
+             for name, duration in sorted(res["modules"].items(), key=lambda e: -e[1])[:top]]
+    print(tabulate(table, ["module", "cumulative (ms)"]))
+
+
+if __name__ == "__main__":
+    argparser = argparse.ArgumentParser(description="Checks the import time of the command line.")
+    argparser.add_argument("--budget", type=float, default=DEFAULT_BUDGET,
+                           help=f"Maximum import time of main.py in seconds (default : {DEFAULT_BUDGET})")
+    argparser.add_argument("--repeat", "-r", type=int, default=5, help="Number of runs, the best one is kept")
+    argparser.add_argument("--output", "-o", help="The JSON file where the results are written")
+    argparser.add_argument("--compare", metavar="baseline", help="The JSON results of a previous run to compare with")
+    argparser.add_argument("--threshold", type=float, default=1.25,
+                           help="Ratio over which the import time is a regression (default : 1.25)")
+    args = argparser.parse_args()
+
+    res = measureImports(repeat=args.repeat)
+    show(res)
+    print(f"\nmain.py imported in {res['total'] * 1000:.2f}ms (budget : {args.budget * 1000:.0f}ms)")
+    if args.output is not None:
+        with open(args.output, "w") as f:
+            json.dump(res, f, indent=2)
+    errors = []
+    if res["total"] > args.budget:
+        errors.append("over budget")
+    eager = eagerModules(res)
+    if eager:
+        errors.append(f"imported at startup: {', '.join(eager)}")
+    if args.compare is not None:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        ratio = res["total"] / baseline["total"]
+        print(f"baseline : {baseline['total'] * 1000:.2f}ms, ratio {ratio:.2f}")
+        if ratio > args.threshold:
+            errors.append(f"{ratio:.2f} times slower than the baseline")
+    if errors:
+        print(colored("\n".join(errors), "red"))
+        sys.exit(1)
@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+Writes synthetic AndroidManifest.xml files of any size for the benchmarks.
+"""
+import argparse
+import random
+import xml.etree.ElementTree as ET
+
+ANDROID_NS = "http://schemas.android.com/apk/res/android"
+COMPONENT_TYPES = ["activity", "service", "receiver", "provider"]
+PROTECTION_LEVELS = ["normal", "dangerous", "signature", "signatureOrSystem"]
+
+
+def _android(name):
+    return f"{{{ANDROID_NS}}}{name}"
+
+
+def buildManifest(components, package="com.example.synthetic", permissions=None, seed=0):
+    """
+    Generates a manifest with the given number of components spread over the 4 component types.
+    Like in real applications, some components are exported, protected by custom permissions
+    (some of them not declared) or declare intent filters with several data elements,
+    and some providers grant URI permissions.
+
+    :param permissions: the number of custom permissions declared, by default one per 100 components
+    :return: the root Element
+    """
+    rnd = random.Random(seed)
+    if permissions is None:
+        permissions = max(1, components // 100)
+    root = ET.Element("manifest", {"package": package, _android("versionCode"): "1",
+                                   _android("versionName"): "1.0"})
+    ET.SubElement(root, "uses-sdk", {_android("minSdkVersion"): "21", _android("targetSdkVersion"): "30"})
+    for perm in ["INTERNET", "CAMERA", "READ_CONTACTS", "ACCESS_FINE_LOCATION"]:
+        ET.SubElement(root, "uses-permission", {_android("name"): f"android.permission.{perm}"})
+    declared = [f"{package}.permission.P{i}" for i in range(permissions)]
+    for i, perm in enumerate(declared):
+        ET.SubElement(root, "permission", {_android("name"): perm,
+                                           _android("protectionLevel"): PROTECTION_LEVELS[i % 4]})
+        if rnd.random() < 0.5:
+            ET.SubElement(root, "uses-permission", {_android("name"): perm})
+    # used by some components but never declared
+    undeclared = [f"{package}.permission.Undeclared{i}" for i in range(max(1, permissions // 10))]
+
+    app = ET.SubElement(root, "application", {
+        _android("allowBackup"): "true",
+        _android("label"): "Synthetic",
+        _android("usesCleartextTraffic"): "false",
+    })
+    for i in range(components):
+        tag = COMPONENT_TYPES[i % 4]
+        attrs = {_android("name"): f"{package}.{tag.capitalize()}{i}"}
+        if rnd.random() < 0.3:
+            attrs[_android("exported")] = rnd.choice(["true", "false"])
+        r = rnd.random()
+        if r < 0.2:
+            attrs[_android("permission")] = rnd.choice(declared)
+        elif r < 0.22:
+            attrs[_android("permission")] = rnd.choice(undeclared)
+        if tag == "provider":
+            attrs[_android("authorities")] = f"{package}.provider{i}"
+            if rnd.random() < 0.3:
+                attrs[_android("grantUriPermissions")] = "true"
+            if rnd.random() < 0.2:
+                attrs[_android("readPermission")] = rnd.choice(declared)
+        if tag == "activity" and rnd.random() < 0.1:
+            attrs[_android("launchMode")] = "singleTask"
+        c = ET.SubElement(app, tag, attrs)
+        if tag != "provider" and rnd.random() < 0.4:
+            intent = ET.SubElement(c, "intent-filter")
+            ET.SubElement(intent, "action", {_android("name"): "android.intent.action.VIEW"})
+            ET.SubElement(intent, "category", {_android("name"): "android.intent.category.DEFAULT"})
+            ET.SubElement(intent, "category", {_android("name"): "android.intent.category.BROWSABLE"})
+            ET.SubElement(intent, "data", {_android("scheme"): "https"})
+            ET.SubElement(intent, "data", {_android("scheme"): f"app{i}"})
+            ET.SubElement(intent, "data", {_android("host"): f"h{i}.example.com"})
+            for j in range(rnd.randint(0, 3)):
+                ET.SubElement(intent, "data", {_android("pathPrefix"): f"/path{j}"})
+            if rnd.random() < 0.1:
+                ET.SubElement(intent, "data", {_android("mimeType"): "text/plain"})
+    return root
+
+
+def writeManifest(path, components, package="com.example.synthetic", permissions=None, seed=0):
+    """
+    Writes a synthetic manifest to path, see buildManifest.
+    """
+    ET.register_namespace("android", ANDROID_NS)
+    ET.ElementTree(buildManifest(components, package, permissions, seed)).write(path, encoding="utf-8",
+                                                                                xml_declaration=True)
+    return path
+
+
+if __name__ == "__main__":
+    argparser = argparse.ArgumentParser(description="Generates a synthetic AndroidManifest.xml file.")
+    argparser.add_argument("output", help="The path of the manifest to write.")
+    argparser.add_argument("--components", "-c", type=int, default=100)
+    argparser.add_argument("--permissions", "-p", type=int, help="Number of custom permissions "
+                                                                 "(default : one per 100 components)")
+    argparser.add_argument("--seed", type=int, default=0)
+    args = argparser.parse_args()
+    writeManifest(args.output, args.components, permissions=args.permissions, seed=args.seed)
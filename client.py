@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+"""
+Thin client of the analysis daemon (main.py --serve), taking the same arguments as main.py.
+The command line is run by the daemon, where the modules are already loaded, and its output is written here.
+A file can be sent instead of a path with "-", its content is then read from the standard input.
+Without a daemon, main.py is run as usual.
+"""
+from src.config import DAEMON_SOCKET_PATH
+import base64
+import socket
+import json
+import sys
+import os
+
+MAIN_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "main.py")
+# the daemon can't interact with the device nor start another daemon
+LOCAL_OPTIONS = {"--adb", "--serve"}
+
+
+def request(argv, data=None, socketPath=DAEMON_SOCKET_PATH):
+    """
+    Sends a command line to the daemon and returns its response: the output, the exit code and the result
+    (the JSON results of the analysis, or the summary of the batch).
+    Raises OSError if no daemon is listening.
+
+    :param data: the content of the file analyzed instead of the "-" path
+    """
+    req = {
+        "argv": argv,
+        "cwd": os.getcwd(),
+        "tty": sys.stdout.isatty(),
+        "env": {name: os.environ[name] for name in ["FORCE_COLOR", "NO_COLOR", "ANSI_COLORS_DISABLED", "TERM"]
+                if name in os.environ},
+    }
+    if req["tty"]:
+        # the daemon has no terminal to get the width from
+        req["env"]["COLUMNS"] = str(os.get_terminal_size().columns)
+    if data is not None:
+        req["data"] = base64.b64encode(data).decode()
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as s:
+        s.connect(socketPath)
+        s.sendall(json.dumps(req).encode() + b"\n")
+        s.shutdown(socket.SHUT_WR)
+        with s.makefile("rb") as f:
+            return json.loads(f.readline())
+
+
+def runLocally():
+    os.execv(sys.executable, [sys.executable, MAIN_PATH] + sys.argv[1:])
+
+
+if __name__ == "__main__":
+    argv = sys.argv[1:]
+    if LOCAL_OPTIONS.intersection(argv):
+        runLocally()
+    data = sys.stdin.buffer.read() if "-" in argv else None
+    try:
+        response = request(argv, data)
+    except (FileNotFoundError, ConnectionRefusedError):
+        if data is not None:
+            sys.exit("A daemon is required to analyze the standard input (python3 main.py --serve)")
+        runLocally()
+    for fd, s in response["output"]:
+        stream = sys.stdout if fd == 1 else sys.stderr
+        stream.write(s)
+        # keeps the order of stdout and stderr when they go to the same file
+        stream.flush()
+    sys.exit(response["code"])
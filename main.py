@@ -1,21 +1,25 @@
 #!/usr/bin/env python3
 import argparse
 import sys
-from src.parser import Parser
-from src.apkParser import APKParser
-from src.analyzer import Analyzer
+from src.batch import analyze, collectPaths, runBatch, showSummary, jsonLinesRecord, BatchResult
+from src.resultCache import ResultCache, DecodedCache
+from src.checks import CHECKS, selectChecks
 from src.constants import ANDROID_MAX_SDK
+from src.config import CHECK_THREADS, DAEMON_SOCKET_PATH
 import logging
-from src.utils import CustomFormatter
+from src.utils import CustomFormatter, JSONLinesSink
 from src.external import downloadAPK
-import tempfile
+import contextlib
+import time
 import xml.etree.ElementTree
+import os
 
 
-if __name__ == "__main__":
+def buildArgParser():
     argparser = argparse.ArgumentParser(description='Utility to analyse Android Manifest files.')
     argparser.add_argument('--log-level', '-v', type=int, choices=[0, 1, 2], help='Sets the log level', default=0)
-    argparser.add_argument("path", help="The path to the manifest file.")
+    argparser.add_argument("path", nargs="*", help="The path to the manifest file. Several files or directories of "
+                                                   "APKs can be given to analyze them in batch.")
     argparser.add_argument("--min-sdk-version", '-min', type=int, choices=range(1, ANDROID_MAX_SDK+1),
                            help='Indicate the minimum version supported by your application',
                            metavar=f"[1,{ANDROID_MAX_SDK}]", required=True)
@@ -28,8 +32,65 @@ if __name__ == "__main__":
                            metavar=f"[1,{ANDROID_MAX_SDK}]", default=ANDROID_MAX_SDK)
     argparser.add_argument('--adb', action="store_true", help='Indicates to use ADB. The path argument is treated as '
                                                               'the app\'s package name')
-    argparser.add_argument('--json', metavar="file", help='Export the results in JSON format to a file.')
-    args = argparser.parse_args()
+    argparser.add_argument('--json', metavar="file", help='Export the results in JSON format to a file. '
+                                                          'In batch mode, the summary of the run is exported.')
+    argparser.add_argument('--no-cache', action="store_true", help='Do not reuse nor store the JSON results and '
+                                                                   'the decoded files of previous analyses.')
+    argparser.add_argument('--only', metavar="checks", type=lambda s: s.split(","),
+                           help='Only run the given checks (comma separated names, see --list-checks).')
+    argparser.add_argument('--skip', metavar="checks", type=lambda s: s.split(","),
+                           help='Do not run the given checks (comma separated names, see --list-checks).')
+    argparser.add_argument('--list-checks', action="store_true", help='List the available checks and exit.')
+    argparser.add_argument('--headless', action="store_true", help='Only write the JSON results (requires --json), '
+                                                                   'nothing is displayed.')
+    argparser.add_argument('--profile', action="store_true", help='Measure the time spent in each check and parser '
+                                                                  'query. Shown at the end and added to the JSON '
+                                                                  'output.')
+    argparser.add_argument('--threads', type=int, default=CHECK_THREADS,
+                           help=f'Number of checks run at the same time (default : {CHECK_THREADS}). The output '
+                                f'is the same whatever the value.')
+    argparser.add_argument('--file-list', metavar="file", help='Batch mode: analyze the files listed in a file '
+                                                               '(one path per line).')
+    argparser.add_argument('--output-dir', metavar="dir", help='Batch mode: the directory where the JSON result of '
+                                                               'each file is written.')
+    argparser.add_argument('--jsonl', metavar="file", help='Append one JSON record per analyzed file to this JSON '
+                                                           'Lines file, as soon as the file is analyzed.')
+    argparser.add_argument('--serve', metavar="socket", nargs="?", const=DAEMON_SOCKET_PATH,
+                           help=f'Start a daemon analyzing the files sent by client.py on a Unix socket '
+                                f'(default : {DAEMON_SOCKET_PATH}), see the README.')
+    argparser.add_argument('--jobs', '-j', type=int, help='Batch mode: number of processes used to analyze the files '
+                                                          '(default : number of CPUs)')
+    return argparser
+
+
+def main(argv=None):
+    """
+    Runs the command line with the given arguments (sys.argv by default) and returns the JSON results of the
+    analysis, or the summary of the batch.
+    """
+    # handled before the other arguments, --min-sdk-version is not needed to list the checks
+    listParser = argparse.ArgumentParser(add_help=False)
+    listParser.add_argument("--list-checks", action="store_true")
+    if listParser.parse_known_args(argv)[0].list_checks:
+        from tabulate import tabulate
+        print(tabulate([(c.name, c.cost, ", ".join(c.needs), c.description) for c in CHECKS],
+                       ["Name", "Cost", "Needs", "Description"]))
+        sys.exit(0)
+    argparser = buildArgParser()
+    args = argparser.parse_args(argv)
+    try:
+        selectChecks(args.only, args.skip)
+    except ValueError as e:
+        argparser.error(str(e))
+    batch = args.file_list is not None or len(args.path) > 1 or any(os.path.isdir(p) for p in args.path)
+    if not args.path and args.file_list is None:
+        argparser.error("the following arguments are required: path")
+    if batch and args.output_dir is None and args.jsonl is None:
+        argparser.error("--output-dir or --jsonl is required to analyze several files")
+    if batch and args.adb:
+        argparser.error("--adb only works with a single package name")
+    if args.headless and args.json is None and args.jsonl is None:
+        argparser.error("--headless requires --json or --jsonl")
     # just follow the same rule as Android for the default value
     args.target_sdk_version = args.target_sdk_version or args.min_sdk_version
     assert args.min_sdk_version <= args.max_sdk_version, "min SDK version cannot be higher than max SDK version"
@@ -51,35 +112,65 @@ if __name__ == "__main__":
         logger.setLevel(logging.ERROR)
 
     # Create stdout handler for logging to the console
-    stdout_handler = logging.StreamHandler()
-    stdout_handler.setFormatter(CustomFormatter())
-    # Add handlers to the logger
-    logger.addHandler(stdout_handler)
+    # only once, the daemon runs the command line several times in the same process
+    if not logger.handlers:
+        stdout_handler = logging.StreamHandler()
+        stdout_handler.setFormatter(CustomFormatter())
+        # Add handlers to the logger
+        logger.addHandler(stdout_handler)
 
-    with tempfile.TemporaryDirectory() as tmpPath:
-        packageName = None
-        if args.adb:
-            packageName = args.path
-            args.path = downloadAPK(args.path, tmpPath)
-
-            if args.path is None:
-                logger.error("Invalid package name !")
-                sys.exit(1)
+    if batch:
+        with JSONLinesSink(args.jsonl) if args.jsonl else contextlib.nullcontext() as sink:
+            summary = runBatch(collectPaths(args.path, args.file_list), args, args.output_dir, args.jobs, sink)
+        showSummary(summary, args.json)
+        if summary["failed"]:
+            sys.exit(1)
+        return summary
+    args.path = args.path[0]
 
-        try:
-            # try as APK
-            parser = APKParser(args.path)
-            if parser.apk is None:
-                # not an APK file
-                parser = Parser(args.path)
+    packageName = source = None
+    if args.adb:
+        # the APK is analyzed in memory, args.path stays the package name
+        packageName = args.path
+        source = downloadAPK(args.path)
 
-        except FileNotFoundError:
-            logger.error("Invalid file name !")
-            sys.exit(1)
-        except xml.etree.ElementTree.ParseError:
-            logger.error("Invalid file !")
+        if source is None:
+            logger.error("Invalid package name !")
             sys.exit(1)
 
-        analyzer = Analyzer(parser, args)
-        analyzer.packageName = packageName
-        analyzer.runAllTests()
\ No newline at end of file
+    # the cache only holds the JSON results, the analysis can only be skipped when nothing is displayed
+    # results from a device are not reproducible, and a profile measures the analysis, it can't come from the cache
+    cache = None
+    if args.headless and not args.no_cache and not args.adb and not args.profile:
+        cache = ResultCache()
+    decodedCache = None if args.no_cache else DecodedCache()
+
+    start = time.perf_counter()
+    res = error = None
+    try:
+        # try as APK, then as a manifest
+        res = analyze(args, packageName, cache, decodedCache, source)
+
+    except FileNotFoundError:
+        error = "Invalid file name !"
+    except xml.etree.ElementTree.ParseError:
+        error = "Invalid file !"
+    if args.jsonl is not None:
+        with JSONLinesSink(args.jsonl) as sink:
+            sink.write(jsonLinesRecord(BatchResult(args.path, None if error else args.json, error,
+                                                   time.perf_counter() - start), res))
+    if error is not None:
+        logger.error(error)
+        sys.exit(1)
+    return res
+
+
+if __name__ == "__main__":
+    serveParser = argparse.ArgumentParser(add_help=False)
+    serveParser.add_argument("--serve", nargs="?", const=DAEMON_SOCKET_PATH)
+    serveArgs, _ = serveParser.parse_known_args()
+    if serveArgs.serve is not None:
+        from src.daemon import serve
+        serve(serveArgs.serve, main)
+    else:
+        main()
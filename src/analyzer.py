@@ -1,29 +1,94 @@
-from termcolor import colored
-from tabulate import tabulate
 from .utils import (
-    printTestInfo,
-    printSubTestInfo,
-    checkDigitalAssetLinks,
-    handleVersion, unformatFilename
+    handleVersion, unformatFilename,
+    writeJSON
 )
 import logging
-from .constants import dangerous_perms
+import threading
+import functools
+import contextlib
+from .constants import dangerous_perms, string_indicators, FIREBASE_URL_PATTERN
 from .apkParser import APKParser
 from .networkSecParser import NetworkSecParser
-from collections import namedtuple
+from .stringScanner import StringScanner
+from .checks import selectChecks, DEVICE
+from .scheduler import runInOrder
+from .profiler import Profiler
+from .records import Cert
 from .external import runAPKSigner, performBackup
-import json
+from .resultCache import AssetLinksCache
+from .console import Console, HeadlessConsole
 
 
 class Analyzer:
+    # compiled once for all the analyzed APKs
+    stringScanner = StringScanner(string_indicators)
 
-    def __init__(self, parser, args):
+    def __init__(self, parser, args, console=None, profiler=None):
+        """
+        :param console: the Console rendering the analysis, by default depends on --headless
+        :param profiler: the Profiler of --profile, if it already measured the decoding of the manifest
+        """
         self.parser = parser
         self.args = args
         self.isAPK = type(self.parser) is APKParser
-        self.logger = logging.getLogger("MainLogger")
+        # --headless only fills the JSON results, nothing is rendered
+        if console is None:
+            console = HeadlessConsole() if getattr(self.args, "headless", False) else Console()
+        self.console = console
+        self.logger = self.console.logger
         self.packageName = None
-        self.json_result = {}
+        self._json_result = {}
+        # JSON section of the check running in the current thread (see runAllTests)
+        self._local = threading.local()
+        # --profile measures the checks and the parser queries
+        if profiler is None and getattr(self.args, "profile", False):
+            profiler = Profiler()
+        self.profiler = profiler
+        if self.profiler is not None and self.isAPK:
+            self.parser.measureMemory = True
+        # the other AXML files and the resource table are decoded by private methods
+        # the manifest is decoded when the parser is created, see getParser
+        self._instrument(self.parser, ("_getCleanXML", "_loadResources"))
+
+    def _instrument(self, parser, private=()):
+        """
+        Measures the queries of a parser when profiling. Returns the parser.
+        """
+        if self.profiler is not None:
+            self.profiler.instrument(parser, private)
+        return parser
+
+    @property
+    def json_result(self):
+        """
+        The JSON results. While a check runs, only its own section.
+        """
+        section = getattr(self._local, "section", None)
+        return self._json_result if section is None else section
+
+    def _runCheck(self, check):
+        """
+        Runs a check and returns the JSON section it wrote.
+        """
+        self._local.section = {}
+        try:
+            with self.profiler.measure("checks", check.name) if self.profiler else contextlib.nullcontext():
+                getattr(self, check.method)()
+            return self._local.section
+        finally:
+            del self._local.section
+
+    def _mergeSection(self, section):
+        """
+        Adds the JSON section of a check to the results, like if it had written them directly.
+        """
+        for key, value in section.items():
+            current = self._json_result.get(key)
+            if isinstance(current, dict) and isinstance(value, dict):
+                # e.g. the apksigner results are part of APKInfo
+                current.update(value)
+            else:
+                self._json_result[key] = value
 
     def showApkInfo(self):
         """
@@ -39,9 +104,9 @@ class Analyzer:
                 - Required hardware or software features
 
         With an APK as input file:
-            Shows all the above information as well as the signature verification
+            The signature verification is shown by verifySignature
         """
-        printTestInfo("APK information")
+        self.console.title("APK information")
         jres = {}
         info = self.parser.getApkInfo()
         self.logger.info(f'Package name: {info.package}')
@@ -73,15 +138,15 @@ class Analyzer:
 
         if uses_sdk_min_sdk_version != 0 and uses_sdk_min_sdk_version != min_sdk_version_args:
             res |= 1
-            warning_msg_1 += colored("(Mismatch between args "
+            warning_msg_1 += self.console.colored("(Mismatch between args "
                                      f"and uses-sdk tag : {uses_sdk_min_sdk_version})", "yellow")
         if uses_sdk_max_sdk_version != 0 and uses_sdk_max_sdk_version != max_sdk_version_args:
             res |= 2
-            warning_msg_2 += colored("(Mismatch between args "
+            warning_msg_2 += self.console.colored("(Mismatch between args "
                                      f"and uses-sdk tag : {uses_sdk_max_sdk_version})", "yellow")
         if uses_sdk_target_sdk_version != 0 and uses_sdk_target_sdk_version != target_sdk_version_args:
             res |= 4
-            warning_msg_3 += colored("(Mismatch between args "
+            warning_msg_3 += self.console.colored("(Mismatch between args "
                                      f"and uses-sdk tag : {uses_sdk_target_sdk_version})", "yellow")
 
         self.logger.info(f'Minimal SDK version: {min_sdk_version_args} {warning_msg_1}')
@@ -137,21 +202,28 @@ class Analyzer:
                 f'Hardware or software feature "{f.name}" can be used by the application '
                 f'(mandatory for runtime : {f.required})')
 
-        if self.isAPK:
-            # if we have an APK and APKSigner is installed
-            res = runAPKSigner(self.args.min_sdk_version, self.args.path)
-            if res is not None:
-                jres["APKSigner"] = res
-
         self.json_result["APKInfo"] = jres
         return res
 
+    def verifySignature(self):
+        """
+        With an APK as input file:
+            Shows the signature verification done by apksigner (if installed)
+        """
+        if not self.isAPK:
+            return
+        res = runAPKSigner(self.args.min_sdk_version, self.parser.source, self.console, self.parser.sourceLock,
+                           self.parser.sourceStart)
+        if res is not None:
+            self.json_result.setdefault("APKInfo", {})["APKSigner"] = res
+        return res
+
     def analyzeRequiredPerms(self):
         """
         Lists all permissions required by the target APK
         Provides an analysis of builtin ones based on protectionLevel
         """
-        printTestInfo("Analyzing required permissions")
+        self.console.title("Analyzing required permissions")
         jsonNormalPerms = []
         jsonDangerousPerms = []
         dangerous_perms_number = 0
@@ -159,7 +231,7 @@ class Analyzer:
             if perm in dangerous_perms:
                 jsonDangerousPerms.append(perm)
                 if self.logger.level <= logging.WARNING:
-                    print(colored(perm, "yellow"))
+                    self.console.print(self.console.colored(perm, "yellow"))
                 dangerous_perms_number += 1
             else:
                 jsonNormalPerms.append(perm)
@@ -180,7 +252,7 @@ class Analyzer:
         """
         Analyzes custom permissions definitions based on protectionLevel
         """
-        printTestInfo("Analyzing custom permissions definition")
+        self.console.title("Analyzing custom permissions definition")
         # Purpose : display custom permissions whose protectionLevel is inferior or equal to dangerous
         # because this means another malicious apps can require and get the permission
         table = []
@@ -194,8 +266,8 @@ class Analyzer:
             jres.append({"name": name, "protection level": protectionLevel})
 
             if protectionLevel == "normal" or protectionLevel == "dangerous":
-                name = colored(name, "red")
-                protectionLevel = colored(protectionLevel, "red")
+                name = self.console.colored(name, "red")
+                protectionLevel = self.console.colored(protectionLevel, "red")
                 table.append([name, protectionLevel])
                 dangerous_protection_level += 1
             elif self.logger.level <= logging.INFO:
@@ -203,7 +275,7 @@ class Analyzer:
 
         self.json_result["custom permissions"] = jres
         if len(table) > 0:
-            print(tabulate(table, header, tablefmt="fancy_grid"))
+            self.console.print(self.console.tabulate(table, header))
         if dangerous_protection_level > 0:
             if dangerous_protection_level == 1:
                 msg = "permission"
@@ -222,7 +294,7 @@ class Analyzer:
         https://developer.android.com/about/versions/12/behavior-changes-12#adb-backup-restrictions
         :return: True if ADB backup is allowed, False otherwise.
         """
-        printSubTestInfo("Checking for ADB backup functionality")
+        self.console.subtitle("Checking for ADB backup functionality")
         backup_attr = self.parser.allowBackup()
         debuggable = self.parser.debuggable()
 
@@ -258,26 +330,26 @@ class Analyzer:
         BackupAgentHelper is defined, and Key-value backup when a BackupAgentHelper is defined.
         :return: True if Auto Backup is allowed, False otherwise.
         """
-        printSubTestInfo("Checking for Auto-Backup functionality")
+        self.console.subtitle("Checking for Auto-Backup functionality")
         backup_attr = self.parser.allowBackup()
         fullBackupOnly = self.parser.fullBackupOnly()
         agent = self.parser.backupAgent()
 
         def encrypted(condition=False):
             if condition:
-                print(colored("On Android 9 (API 28) and higher", attrs=["bold"]))
-            self.logger.info(colored("E2E encrypted with user's password", "green"))
+                self.console.print(self.console.colored("On Android 9 (API 28) and higher", attrs=["bold"]))
+            self.logger.info(self.console.colored("E2E encrypted with user's password", "green"))
             return True
 
         def unencrypted(condition=False):
             if condition:
-                print(colored("On Android 8.1 (API 27) and lower", attrs=["bold"]))
+                self.console.print(self.console.colored("On Android 8.1 (API 27) and lower", attrs=["bold"]))
             self.logger.warning("E2E encryption not available")
             return False
 
         def used():
             self.logger.warning("Google drive Auto-Backup functionality is activated")
-            printSubTestInfo("Checking Auto-Backup E2E encryption")
+            self.console.subtitle("Checking Auto-Backup E2E encryption")
             return True, handleVersion(unencrypted, encrypted, 28, self.args.min_sdk_version, self.args.max_sdk_version,
                                        self.args.target_sdk_version, False)
 
@@ -305,7 +377,7 @@ class Analyzer:
 
         :return: True if a backupAgent property has been found in Manifest, False otherwise.
         """
-        printSubTestInfo("Checking for own developer backup agent")
+        self.console.subtitle("Checking for own developer backup agent")
         agent = self.parser.backupAgent()
         if agent:
             # needed for unit tests to not crash when calling backup functions separately
@@ -332,7 +404,7 @@ class Analyzer:
         However, for all versions higher or equal than Android 12 (API 31), fullBackupContent is overriden
         with datExtractionRules.
         """
-        printSubTestInfo("Checking backup rules files")
+        self.console.subtitle("Checking backup rules files")
         fullBackupContent_xml_file_rules = self.parser.fullBackupContent()
         dataExtractionRules_xml_rules_files = self.parser.dataExtractionRules()
 
@@ -355,7 +427,7 @@ class Analyzer:
                                   "flags": e.requireFlags} for e in rules]
                 self.json_result["Backup"]["rules"] = jres
                 if len(table) > 0:
-                    self.logger.info(tabulate(table, headers, tablefmt="fancy_grid"))
+                    self.logger.info(self.console.tabulate(table, headers))
                 return 1
             self.logger.warning(f'targetSdk parameter value is {self.args.target_sdk_version}. '
                                 f'As backup is allowed, it is recommended to specify custom exclusions in '
@@ -382,7 +454,7 @@ class Analyzer:
                         else:
                             self.logger.warning("Cloud backup are performed even if they cannot be encrypted.")
                         self.logger.info("Cloud backup rules have been defined :")
-                        self.logger.info(tabulate(table, headers, tablefmt="fancy_grid"))
+                        self.logger.info(self.console.tabulate(table, headers))
                     # show device transfer rules
                     table = [[e.type, e.domain, e.path, e.requireFlags] for e in deviceTransferRules]
                     jres["rules"] = [{"type": e.type,
@@ -392,7 +464,7 @@ class Analyzer:
                     self.json_result["Backup"]["rules"] = jres
                     if len(table) > 0:
                         self.logger.info("Cloud backup rules have been defined :")
-                        self.logger.info(tabulate(table, headers, tablefmt="fancy_grid"))
+                        self.logger.info(self.console.tabulate(table, headers))
                 return 2
             self.logger.warning(f'targetSdk parameter value is {self.args.target_sdk_version}. '
                                 f'As backup is allowed, it is recommended to specify custom exclusions in '
@@ -413,7 +485,7 @@ class Analyzer:
             Does the above and if applicable, summarizes network_security_config file content in a table
             (taking into account Android versions and their corresponding default values and configurations)
         """
-        printTestInfo("Checking the existence of network_security_config XML file")
+        self.console.title("Checking the existence of network_security_config XML file")
         network_security_config_xml_file = self.parser.networkSecurityConfig()
         self.json_result["Network security config"] = {"file": unformatFilename(network_security_config_xml_file)}
         if network_security_config_xml_file is not None:
@@ -429,7 +501,7 @@ class Analyzer:
         """
         Regroups all functions related to backup analysis
         """
-        printTestInfo("Analyzing backup functionality")
+        self.console.title("Analyzing backup functionality")
         jres = {}
         isADBBackupAllowed = self.isADBBackupAllowed()
         jres["ADB"] = isADBBackupAllowed
@@ -450,7 +522,7 @@ class Analyzer:
         Default value is False
         https://developer.android.com/guide/topics/manifest/application-element#debug
         """
-        printTestInfo("Checking compilation mode")
+        self.console.title("Checking compilation mode")
         debuggable = self.parser.debuggable()
         self.json_result["Debug"] = {"allowed": debuggable}
         if debuggable:
@@ -472,7 +544,7 @@ class Analyzer:
          - Do not add deeplinks or applinks, as they cannot have specific permissions (by default they are used
            to call our app when a specific URI is handled by another app)
         """
-        printTestInfo("Analyzing permissions set on exported components")
+        self.console.title("Analyzing permissions set on exported components")
         headers = ["Name", "Type", "Permission", "readPermission", "writePermission"]
         table = []
         # Getting deeplink (don't analyze exported component which is a deeplink)
@@ -507,8 +579,8 @@ class Analyzer:
 
                     if (t != "provider" and p is None) or (
                             t == "provider" and wp is None and rp is None and p is None):
-                        cName = colored(n, "yellow")
-                        cType = colored(t, "yellow")
+                        cName = self.console.colored(n, "yellow")
+                        cType = self.console.colored(t, "yellow")
                         if self.logger.level <= logging.WARNING:
                             table.append([cName, cType, p, rp, wp])
                             count += 1
@@ -534,7 +606,7 @@ class Analyzer:
                 headers.pop(-1)
 
             self.logger.info("Deeplinks are not shown in table below because they never have permissions")
-            print(tabulate(table, headers, tablefmt="fancy_grid"))
+            self.console.print(self.console.tabulate(table, headers))
         if count > 0:
             self.logger.warning(
                 f'There are {count} exported components which can be called without any permission. Check it out!')
@@ -547,7 +619,7 @@ class Analyzer:
         This information is useful because in combination with other vulnerabilities it 
         is possible to exploit those components
         """
-        printTestInfo("Analyzing unexported providers")
+        self.console.title("Analyzing unexported providers")
         res = self.parser.getUnexportedProviders()
         self.json_result["Unexported providers"] = list(res)
         msg = ""
@@ -560,7 +632,7 @@ class Analyzer:
                 f'Found {len(res)} unexported {msg} with grantUriPermissions set to True. Please make deeper checks!')
         if self.logger.level <= logging.WARNING:
             for e in res:
-                print(f'\t{e}')
+                self.console.print(f'\t{e}')
 
     def isCleartextTrafficAllowed(self):
         """
@@ -577,7 +649,7 @@ class Analyzer:
             (taking into account Android versions and there corresponding default values and configurations)
             
         """
-        printTestInfo("Checking if http traffic can be used")
+        self.console.title("Checking if http traffic can be used")
         network_security_config_xml_file = self.parser.networkSecurityConfig()
 
         def allowed():
@@ -592,7 +664,7 @@ class Analyzer:
 
         def notIgnored(condition=False):
             if condition:
-                print(colored("On Android 6 (API 23) and lower", attrs=["bold"]))
+                self.console.print(self.console.colored("On Android 6 (API 23) and lower", attrs=["bold"]))
             cleartextTraffic = self.parser.usesCleartextTraffic()
             if cleartextTraffic:
                 return allowed()
@@ -604,7 +676,7 @@ class Analyzer:
 
         def ignored(condition=False):
             if condition:
-                print(colored("On Android 7.0 (API 24) and higher", attrs=["bold"]))
+                self.console.print(self.console.colored("On Android 7.0 (API 24) and higher", attrs=["bold"]))
             self.logger.info("The usesCleartextTraffic attribute is overridden by the network security configuration.")
             r = self.analyzeNSCClearTextTraffic()
             if not self.isAPK:
@@ -640,44 +712,51 @@ class Analyzer:
         """
         Displays information about exported components Intent Filter (scheme, host, port, path)
         """
-        printTestInfo("Gathering information on exported components which specified Intent Filters")
+        self.console.title("Gathering information on exported components which specified Intent Filters")
         headers = ["Name", "Action", "Category", "Link", "Mime Type"]
         table = []
         for e, tag in self.parser.getIntentFilterExportedComponents():
             for intent_data in self.parser.getIntentFilters(e):
                 row = [f'{e.split(".")[-1]}\n({tag})']
                 # split mime types over two lines if too big
+                # the parser results are cached, so work on a copy
                 mt = intent_data[-1]
                 if len(mt) > 40:
                     mt = "/\n".join(mt.split("/"))
-                    intent_data[-1] = mt
-                row += intent_data
+                row += intent_data[:-1] + [mt]
                 table.append(row)
         if len(table) > 0:
-            self.logger.info(tabulate(table, headers, tablefmt="fancy_grid"))
+            self.logger.info(self.console.tabulate(table, headers))
 
     def isAppLinkUsed(self):
         """
         Checks if APK defines AppLink(s)
         Applink is a specific type of deeplink with android:autoVerify property in its intent filter.
         """
-        printSubTestInfo("Checking for AppLinks")
+        self.console.subtitle("Checking for AppLinks")
         res = self.parser.getUniversalLinks()
         verified_hosts = {h for e in res if e.autoVerify for h in e.hosts}
+        # all the hosts are verified at the same time
+        active_hosts = {}
+        if verified_hosts:
+            # requests is slow to import, so only when there are hosts to verify
+            from .assetLinks import AssetLinksVerifier
+            cache = None if getattr(self.args, "no_cache", False) else AssetLinksCache()
+            active_hosts = AssetLinksVerifier(cache).verify(verified_hosts)
 
         jres = []
         for host in verified_hosts:
             jhost = {"host": host}
             # check if the assetlink.json is publicly accessible
-            active_msg = colored("Digital Asset Link JSON file not found", "red")
+            active_msg = self.console.colored("Digital Asset Link JSON file not found", "red")
             jhost["active"] = False
-            if checkDigitalAssetLinks(host):
+            if active_hosts[host]:
                 jhost["active"] = True
-                active_msg = colored(
+                active_msg = self.console.colored(
                     f"Digital Asset Link JSON file found at https://{host}/.well-known/assetlinks.json", "green")
             self.logger.warning(f'Found an applink with host "{host}":')
             if self.logger.level <= logging.WARNING:
-                print(active_msg)
+                self.console.print(active_msg)
 
             # only applink infos for this particular host
             applinks = [e for e in res if host in e.hosts]
@@ -695,12 +774,12 @@ class Analyzer:
                 jactivity["uris"] = [e for applink in applinks_with_this_name for e in applink.uris]
                 jhost["components"].append(jactivity)
                 if len(applinks_with_this_name) > 0 and self.logger.level <= logging.WARNING:
-                    print(colored(f'\tDeclared in {applinks_with_this_name[0].tag} {name.split(".")[-1]}'
+                    self.console.print(self.console.colored(f'\tDeclared in {applinks_with_this_name[0].tag} {name.split(".")[-1]}'
                                   f' with the following URI :', "yellow"))
                     # show the URI
                     for applink in applinks_with_this_name:
                         for uri in applink.uris:
-                            print(f"\t\t{uri}")
+                            self.console.print(f"\t\t{uri}")
             jres.append(jhost)
         self.json_result["App links"] = jres
         return len(verified_hosts)
@@ -710,7 +789,7 @@ class Analyzer:
         Checks if APK defines DeepLink(s)
         DeepLink is a component specifying an intent filter (with action = VIEW and category = BROWSABLE) 
         """
-        printSubTestInfo("Checking for DeepLinks")
+        self.console.subtitle("Checking for DeepLinks")
         res = self.parser.getUniversalLinks()
         unique_names = {deeplink.name for deeplink in res}
         jres = []
@@ -729,7 +808,7 @@ class Analyzer:
             for deeplink in deeplinks:
                 for uri in deeplink.uris:
                     if self.logger.level <= logging.WARNING:
-                        print(f"\t{uri}")
+                        self.console.print(f"\t{uri}")
 
         self.json_result["Deep links"] = jres
         return len(unique_names) > 0
@@ -739,14 +818,20 @@ class Analyzer:
         Regroups all functions related to Intent Filters analysis
         """
         self.getIntentFilterInfo()
-        if self.isDeepLinkUsed():
+        self.isDeepLinkUsed()
+
+    def analyzeAppLinks(self):
+        """
+        Checks the app links if there are deep links, as they are a specific type of deep links
+        """
+        if len(self.parser.getUniversalLinks()) > 0:
             self.isAppLinkUsed()
 
     def getExportedComponents(self):
         """
         Lists all exported components
         """
-        printTestInfo("Listing exported components")
+        self.console.title("Listing exported components")
         jres = {}
         for component in ["activity", "receiver", "provider", "service"]:
             jres[component] = [e.split(".")[-1] for e in self.parser.exportedComponents(component)]
@@ -760,13 +845,32 @@ class Analyzer:
         """
         # the rest of the code will do nothing if not an APK
         if self.isAPK:
-            printTestInfo("Looking for Firebase URL")
-        res = self.parser.searchInStrings("https://.*firebaseio.com")
+            self.console.title("Looking for Firebase URL")
+        res = self.parser.searchInStrings(FIREBASE_URL_PATTERN)
         self.json_result["Firebase"] = res
         if len(res) > 0:
             for e in res:
                 self.logger.info(f"\t{e}")
 
+    def checkForSensitiveStrings(self):
+        """
+        Looks for indicators like API keys, cloud storage buckets or internal hostnames in the string resources.
+        All the indicators are searched in a single pass over the strings.
+        The Firebase URLs are reported by checkForFirebaseURL.
+        """
+        # the rest of the code will do nothing if not an APK
+        if self.isAPK:
+            self.console.title("Looking for sensitive strings")
+        jres = {}
+        for e in self.parser.scanStrings(self.stringScanner):
+            jres.setdefault(e.pattern, []).append(e.string)
+        self.json_result["Sensitive strings"] = jres
+        for pattern, strings in jres.items():
+            self.logger.warning(f"{pattern}:")
+            for e in strings:
+                self.logger.info(f"\t{e}")
+        return jres
+
     def analyzeNSCTrustAnchors(self, nsParser=None):
         """
         Displays the trust anchors configured in the network_security_config file.
@@ -779,9 +883,8 @@ class Analyzer:
             nsf = self.parser.getNetworkSecurityConfigFile()
             if nsf is None:
                 return
-            printSubTestInfo("Analysing Network security trust anchors configuration")
-            nsParser = NetworkSecParser(nsf, self.parser.debuggable())
-        cert = namedtuple("Cert", "src overridePins")
+            self.console.subtitle("Analysing Network security trust anchors configuration")
+            nsParser = self._instrument(NetworkSecParser(nsf, self.parser.debuggable()))
 
         def show_config(inherited_ta):
             jres = {"inherited": [e.src for e in inherited_ta]}
@@ -804,12 +907,12 @@ class Analyzer:
 
         def for23andlower():
             # system and user as default
-            inherited_ta = [cert("system", False), cert("user", False)]
+            inherited_ta = [Cert("system", False), Cert("user", False)]
             return show_config(inherited_ta)
 
         def for24andabove():
             # only system as default
-            inherited_ta = [cert("system", False)]
+            inherited_ta = [Cert("system", False)]
             return show_config(inherited_ta)
 
         baseConfig = nsParser.getBaseConfig()
@@ -832,8 +935,8 @@ class Analyzer:
             nsf = self.parser.getNetworkSecurityConfigFile()
             if nsf is None:
                 return
-            printSubTestInfo("Analysing Network security cleartext traffic configuration")
-            nsParser = NetworkSecParser(nsf)
+            self.console.subtitle("Analysing Network security cleartext traffic configuration")
+            nsParser = self._instrument(NetworkSecParser(nsf))
 
         def ctallowed():
             self.logger.warning("Clear text traffic is allowed for all domains.")
@@ -849,8 +952,8 @@ class Analyzer:
             dom = nsParser.getAllDomains(inheritedCT=False, withCT=True)
             doms = [f'\t{e}' for e in dom]
             if len(doms) > 0:
-                self.logger.info(colored("Except for:", "yellow"))
-                self.logger.info(colored("\n".join(doms), "yellow"))
+                self.logger.info(self.console.colored("Except for:", "yellow"))
+                self.logger.info(self.console.colored("\n".join(doms), "yellow"))
             return False, dom
 
         baseConfig = nsParser.getBaseConfig()
@@ -875,8 +978,8 @@ class Analyzer:
             nsf = self.parser.getNetworkSecurityConfigFile()
             if nsf is None:
                 return
-            printSubTestInfo("Analysing Network security certificate pinning configuration")
-            nsParser = NetworkSecParser(nsf, self.parser.debuggable())
+            self.console.subtitle("Analysing Network security certificate pinning configuration")
+            nsParser = self._instrument(NetworkSecParser(nsf, self.parser.debuggable()))
 
         from datetime import datetime
         baseConfig = nsParser.getBaseConfig()
@@ -894,7 +997,7 @@ class Analyzer:
             color = "green"
             if datetime.strptime(e.pinset, "%Y-%m-%d") < datetime.today():
                 color = "red"
-            msg += colored(exp, color)
+            msg += self.console.colored(exp, color)
             jdomain["expiration"] = e.pinset
             jdomain["override PIN"] = e.overridePins
             jres.append(jdomain)
@@ -905,7 +1008,7 @@ class Analyzer:
                 if len(e.overridePins) > 1:
                     msg2 += "s"
                 msg2 += f": {', '.join(e.overridePins)}"
-                msg += colored(msg2, "yellow")
+                msg += self.console.colored(msg2, "yellow")
             self.logger.info(msg)
 
         if self.json_result.get("Network security config") is None:
@@ -919,7 +1022,7 @@ class Analyzer:
         Please refer to StrandHogg vulnerability to get more info
         """
         # TODO : check minsdk
-        printTestInfo("Checking for task hijacking vulnerabbilities")
+        self.console.title("Checking for task hijacking vulnerabbilities")
         vunerable_activities = self.parser.getSingleTaskActivities()
         self.json_result["Single task activities"] = vunerable_activities
 
@@ -940,7 +1043,7 @@ class Analyzer:
             self.logger.critical(f"The following {msg} singleTask launch mode. Application may be vulnerable to Task "
                                  f"Hijacking.")
             for e in vunerable_activities:
-                print(colored(f"{e}", "red"))
+                self.console.print(self.console.colored(f"{e}", "red"))
         else:
             self.logger.info("Application can not be executed on device running Android 9 or lower.")
 
@@ -977,14 +1080,14 @@ class Analyzer:
         - custom permissions are assigned to a component with android:uses-permission instead of android:permission.
         This leads the protection level attribute to be as 'normal' by default.
         """
-        printTestInfo("Analyzing custom permissions usage")
+        self.console.title("Analyzing custom permissions usage")
         analysis = self.analyzeComponentCustomPerms()
         if analysis is None:
             return
         used_but_not_declared, declared_but_not_used = analysis
         jres = {"used but not declared": used_but_not_declared,
                 "declared but not used": declared_but_not_used}
-        printSubTestInfo("Used but not declared")
+        self.console.subtitle("Used but not declared")
         if len(used_but_not_declared) > 0:
             if len(used_but_not_declared) == 1:
                 msg = "permission is"
@@ -993,11 +1096,11 @@ class Analyzer:
 
             self.logger.critical(f"The following {msg} used but not declared. This may be a spelling error which can "
                                  f"lead to restriction bypass.")
-            print(colored("\n".join(used_but_not_declared), "red"))        
+            self.console.print(self.console.colored("\n".join(used_but_not_declared), "red"))        
         else:
             self.logger.info("There is nothing to report about this test.")
 
-        printSubTestInfo("Declared but not used")
+        self.console.subtitle("Declared but not used")
         if len(declared_but_not_used) > 0:
             if len(declared_but_not_used) == 1:
                 msg = "permission is"
@@ -1006,11 +1109,11 @@ class Analyzer:
 
             self.logger.warning(f"The following {msg} declared but not used. A component that is supposed to be "
                                 f"protected may not be.")
-            print(colored("\n".join(declared_but_not_used), "yellow"))        
+            self.console.print(self.console.colored("\n".join(declared_but_not_used), "yellow"))        
         else:
             self.logger.info("There is nothing to report about this test.")        
 
-        printSubTestInfo("Using android:uses-permission instead of android:permission")
+        self.console.subtitle("Using android:uses-permission instead of android:permission")
         component_list = ["activity", "provider", "receiver", "service"]
         res = []
 
@@ -1028,29 +1131,30 @@ class Analyzer:
             msg = "components have"
         self.logger.critical(f"The following {msg} a custom permission assigned with android:uses-permission. This "
                              f"lead its protectionLevel to be set as normal")
-        print(colored("\n".join([f"{e.split('.')[-1]}" for e in res]), "red"))
+        self.console.print(self.console.colored("\n".join([f"{e.split('.')[-1]}" for e in res]), "red"))
 
     def runAllTests(self):
-        print(colored(f"Analysis of {self.args.path}", "magenta", attrs=["bold"]))
-        
-        self.showApkInfo()
+        self.console.print(self.console.colored(f"Analysis of {self.args.path}", "magenta", attrs=["bold"]))
         
-        self.analyzeRequiredPerms()
-        self.analyzeCustomPerms()
-        self.analyzeBackupFeatures()
-        self.isDebuggable()
-        self.getNetworkConfigFile()
-        self.isCleartextTrafficAllowed()
-        self.getExportedComponents()
-        self.analyzeIntentFilters()
-        self.analyzeExportedComponent()
-        self.analyzeUnexportedProviders()
-        self.checkForFirebaseURL()
-        self.analyzeCustomPermsUsage()
-        self.analyzeActivitiesLaunchMode()
+        # --only and --skip select the checks of the registry
+        checks = selectChecks(getattr(self.args, "only", None), getattr(self.args, "skip", None))
+        # the checks run at the same time but their output and results come in the order of the registry
+        tasks = [functools.partial(self._runCheck, check) for check in checks]
+        # with --adb, the user is asked to confirm the backup on the device as soon as the check displays it
+        interactive = [i for i, check in enumerate(checks) if DEVICE in check.needs and self.packageName is not None]
+        with self.profiler.measure("analysis", "all checks") if self.profiler else contextlib.nullcontext():
+            for section in runInOrder(tasks, getattr(self.args, "threads", None) or 1, self.logger,
+                                      self.console.rendering, interactive):
+                self._mergeSection(section)
+
+        if self.profiler is not None:
+            if self.isAPK:
+                self.profiler.resources = self.parser.resourcesInfo()
+            if self.console.rendering:
+                self.console.title("Profile")
+                self.profiler.show()
+            self._json_result["Profile"] = self.profiler.toDict()
 
         if self.args.json is not None:
-            with open(self.args.json, "w") as f:
-                json.dump(self.json_result, f)
-                f.write("\n")
-            self.logger.info(colored(f"\nJSON output written to {self.args.json}.", "green"))
+            writeJSON(self.args.json, self.json_result)
+            self.logger.info(self.console.colored(f"\nJSON output written to {self.args.json}.", "green"))
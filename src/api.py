@@ -0,0 +1,92 @@
+from .parser import Parser
+from .apkParser import APKParser
+from .analyzer import Analyzer
+from .checks import selectChecks
+from .console import HeadlessConsole
+from .resultCache import DecodedCache
+from .profiler import Profiler
+from .constants import ANDROID_MAX_SDK
+from collections import namedtuple
+import contextlib
+import argparse
+import os
+
+# result of the library API, results are the JSON results of the checks by section
+AnalysisResult = namedtuple("AnalysisResult", "package isAPK results")
+
+
+def getParser(source, cache=None, profiler=None):
+    """
+    Parses a file as an APK, or as a manifest if it is not an APK.
+    The source is a path, the content of the file (bytes, bytearray or memoryview) or a seekable binary file object.
+    The decoded files of the APK are kept in the DecodedCache if one is given.
+    The exceptions are the same as the ones of Parser.
+    The parser must be closed once the analysis is done, to unmap the APK.
+
+    :param profiler: the Profiler measuring the decoding of the manifest, if any
+    """
+    with profiler.measure("analysis", "manifest decode") if profiler else contextlib.nullcontext():
+        start = source.tell() if hasattr(source, "seek") else None
+        parser = APKParser(source, cache)
+        if parser.apk is None:
+            # not an APK file
+            if start is not None:
+                source.seek(start)
+            parser = Parser(source)
+    return parser
+
+
+def analyzeParser(parser, args, console=None, packageName=None, profiler=None):
+    """
+    Runs the checks selected by args (see analyzerArgs) on a parser and returns the AnalysisResult.
+    The command line renders the analysis with a Console, by default nothing is rendered.
+
+    :param packageName: the package installed on the device, to perform an ADB backup
+    :param profiler: the Profiler which measured getParser, with --profile
+    """
+    analyzer = Analyzer(parser, args, HeadlessConsole() if console is None else console, profiler)
+    analyzer.packageName = packageName
+    analyzer.runAllTests()
+    return AnalysisResult(parser.getApkInfo().package, parser.apk is not None, analyzer.json_result)
+
+
+def analyzerArgs(minSdk, targetSdk=None, maxSdk=ANDROID_MAX_SDK, only=None, skip=None, threads=1,
+                 profile=False, cache=False):
+    """
+    Builds the options of an analysis, the same as the ones of the command line.
+    Raises ValueError if the SDK versions are not consistent or if a check is unknown.
+    """
+    # just follow the same rule as Android for the default value
+    targetSdk = targetSdk or minSdk
+    if not 1 <= minSdk <= targetSdk <= maxSdk <= ANDROID_MAX_SDK:
+        raise ValueError(f"The SDK versions must be such that 1 <= min ({minSdk}) <= target ({targetSdk}) "
+                         f"<= max ({maxSdk}) <= {ANDROID_MAX_SDK}")
+    selectChecks(only, skip)
+    return argparse.Namespace(path=None, min_sdk_version=minSdk, target_sdk_version=targetSdk,
+                              max_sdk_version=maxSdk, json=None, only=only, skip=skip, threads=threads,
+                              profile=profile, no_cache=not cache, headless=True)
+
+
+def runAnalysis(source, minSdk, targetSdk=None, maxSdk=ANDROID_MAX_SDK, only=None, skip=None,
+                threads=1, profile=False, cache=False):
+    """
+    Analyzes an APK or a manifest and returns an AnalysisResult, without displaying nor writing anything.
+    The checks and their options are the same as the ones of the command line, which renders the same analysis.
+    The messages of the analysis are not logged: its findings are all in the results. The global logging
+    configuration is left untouched, the loggers of pyaxmlparser are configured by the application.
+
+    :param source: the path of the file, its content (bytes, bytearray or memoryview) or a seekable binary file
+                   object. The content is analyzed in memory, it is only written to disk if apksigner is installed.
+    :param threads: the number of checks run at the same time. The checks run on the calling thread by default,
+                    a pool of threads is created for each analysis otherwise.
+    :param cache: reuse the decoded files of the APKs and the verifications of the app links kept on disk
+                  by the command line (see config.py). By default, nothing is kept on disk.
+    :raises ValueError: if the options are not valid
+    :raises FileNotFoundError: if the file does not exist
+    :raises xml.etree.ElementTree.ParseError: if the file is neither an APK nor a manifest
+    """
+    args = analyzerArgs(minSdk, targetSdk, maxSdk, only, skip, threads, profile, cache)
+    args.path = os.fspath(source) if isinstance(source, (str, os.PathLike)) else None
+    profiler = Profiler() if profile else None
+    with contextlib.closing(getParser(source, DecodedCache() if cache else None, profiler)) as parser:
+        return analyzeParser(parser, args, profiler=profiler)
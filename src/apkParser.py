@@ -1,41 +1,171 @@
 from .parser import Parser
-from zipfile import ZipFile, BadZipfile
-from pyaxmlparser.axmlprinter import AXMLPrinter
-from pyaxmlparser.arscparser import ARSCParser
+from zipfile import BadZipfile
 import xml.etree.ElementTree as ET
 import re
+import time
+import hashlib
+import threading
+import tracemalloc
 from .constants import protection_levels
-# for virtual file handling in case of APK
-from io import StringIO
-from .utils import unformatFilename, str2Bool
-from collections import namedtuple
+from .axmlBuilder import buildTree, RESOURCE_ID_PATTERN
+from .resourceIndex import ResourceIndex
+from .utils import unformatFilename, str2Bool, memoized
+from .mappedZip import MappedZip
+from .records import CustomPerm, Rule, ExtractionRules
 
 
 class APKParser(Parser):
+    # DecodedCache where the decoded files are kept between runs, if any
+    cache = None
+    # measure the memory used by the resource table (--profile), see resourcesInfo
+    measureMemory = False
 
-    def __init__(self, path):
+    def __init__(self, source, cache=None):
+        """
+        :param source: the path of the APK, its content (bytes, bytearray or memoryview) or a seekable binary
+                       file object. The content is read where it is, it is never written to disk.
+                       APK files are memory-mapped, see MappedZip.
+        """
+        self.cache = cache
+        self.source = source
+        # the APK starts at the current position of a file object
+        self.sourceStart = source.tell() if hasattr(source, "seek") else 0
         try:
             # Unzip the APK
-            self.apk = ZipFile(path)
-            # Does not always have a resource file so this might be None
-            self.rsc = self._getApkFileContent("resources.arsc")
-            if self.rsc is not None:
-                self.rsc = ARSCParser(self.rsc)
+            self.apk = MappedZip(source)
+            # resources.arsc is only parsed when a resource is needed (see the rsc property)
             # this can change self.apk to None if there is no manifest in the ZIP file
             self._loadManifest()
         except BadZipfile:
-            self.apk = None
+            self.close()
+
+    @property
+    def rsc(self):
+        """
+        The ARSCParser of resources.arsc, loaded on first use.
+        Checks that only need the manifest never pay for parsing the resource table.
+        Does not always have a resource file so this might be None.
+        """
+        # checks running on several threads must not parse it twice
+        with self._loadLock:
+            if "_rsc" not in self.__dict__:
+                content = self._getApkFileContent("resources.arsc")
+                from pyaxmlparser.arscparser import ARSCParser
+                self._rsc = None if content is None else ARSCParser(content)
+        return self._rsc
+
+    @property
+    def resources(self):
+        """
+        The ResourceIndex used to resolve resources, or None if there is no resources.arsc.
+        """
+        with self._loadLock:
+            if "_resources" not in self.__dict__:
+                self._loadResources()
+        return self._resources
+
+    @property
+    def sourceLock(self):
+        """
+        Lock held while the files of the APK are read, the other readers of a file object must hold it too.
+        """
+        # setdefault on __dict__ so it also works for instances created without calling __init__
+        return self.__dict__.setdefault("_sourceLock", threading.Lock())
+
+    @property
+    def _loadLock(self):
+        # setdefault on __dict__ so it also works for instances created without calling __init__
+        return self.__dict__.setdefault("_lock", threading.RLock())
+
+    def _loadResources(self):
+        """
+        Loads the resource index from the cache, or parses resources.arsc,
+        and records what it cost in self.resourcesStats.
+        The memory is only measured when tracemalloc is tracing or with measureMemory.
+        """
+        start = time.perf_counter()
+        # tracemalloc slows everything down, it only traces the loading
+        started = self.measureMemory and not tracemalloc.is_tracing()
+        if started:
+            tracemalloc.start()
+        tracing = tracemalloc.is_tracing()
+        if tracing:
+            before = tracemalloc.get_traced_memory()[0]
+        self._resources = None
+        info = self._getApkFileInfo("resources.arsc")
+        data = None
+        if info is not None and self.cache is not None:
+            key = self.cache.key("resources", self._getApkFileDigest("resources.arsc"))
+            data = self.cache.get(key)
+        if data is not None:
+            self._resources = ResourceIndex.fromDict(data)
+        elif self.rsc is not None:
+            self._resources = ResourceIndex(self.rsc)
+            if self.cache is not None:
+                self.cache.put(key, self._resources.toDict())
+        self.resourcesStats = {
+            "size": 0 if info is None else info.file_size,
+            "cached": data is not None,
+            "time": time.perf_counter() - start,
+            "memory": tracemalloc.get_traced_memory()[0] - before if tracing else None
+        }
+        if started:
+            tracemalloc.stop()
+
+    def resourcesInfo(self):
+        """
+        Returns the size of resources.arsc, the time and memory spent loading it and the hit rates of the lookups.
+        Returns None if the resource table has not been loaded.
+        """
+        stats = getattr(self, "resourcesStats", None)
+        if stats is not None and self._resources is not None:
+            stats = dict(stats, cache=self._resources.cacheInfo())
+        return stats
+
+    def close(self):
+        """
+        Closes the APK. The resource table, which points into the APK, is released too:
+        the parser can't read the APK anymore.
+        """
+        apk, self.apk = getattr(self, "apk", None), None
+        if apk is None:
+            return
+        self.__dict__.pop("_rsc", None)
+        self.__dict__.pop("_resources", None)
+        self.clearCache()
+        apk.close()
+
+    def _getApkFileInfo(self, path):
+        """
+        Returns the ZipInfo of a file of the APK, or None if it does not exist.
+        """
+        try:
+            return self.apk.getinfo(path)
+        except KeyError:
+            pass
 
     def _getApkFileContent(self, path):
         """
-        Reads a file from the APK.
+        Reads a file (path or ZipInfo) from the APK, as a view of the APK if it is not compressed.
         """
         # the pythonic way of checking if a file exists
         try:
-            return self.apk.open(path, "r").read()
+            # a file object which can't be mapped is read from its current position
+            with self.sourceLock:
+                return self.apk.view(path)
         except KeyError:
             pass
 
+    @memoized
+    def _getApkFileDigest(self, path):
+        """
+        Returns the SHA-256 of a file of the APK, or None if it does not exist.
+        The decoded files are cached under the digest of their content.
+        """
+        content = self._getApkFileContent(path)
+        if content is not None:
+            return hashlib.sha256(content).hexdigest()
+
     def _getResource(self, rid, package_name=None, resolve=True):
         """
         Transforms an ID of the form @7F0A01BF into @xml/network_security_config.
@@ -44,60 +174,90 @@ class APKParser(Parser):
         :param resolve: Indicates if we should resolve the string value
         :return: The resource path
         """
-        if self.rsc is None:
+        if self.resources is None:
             # if there is no resources.arsc we can't do anything
             # this should never happen tho
             return rid
-        if package_name is None:
-            # I don't know how to handle the case when there are multiple package names yet
-            package_name = self.rsc.get_packages_names()[0]
-        rid = int(rid.strip("@"), 16)
-        res_type, name, _ = self.rsc.get_id(package_name, rid)
+        res_type, name = self.resources.getId(int(rid.strip("@"), 16), package_name)
         if res_type == "string" and resolve:
-            # index 0 is name, index 1 is the resolved string
-            return self.rsc.get_string(package_name, name)[1]
+            string = self.resources.getString(name, package_name)
+            if string is not None:
+                return string
         return f"@{res_type}/{name}"
 
-    def _getCleanXML(self, path):
+    def _getCleanXML(self, path, resolve=True):
         """
-        Transforms an AXML converted XML file into something closer to the original XML.
-        All resource IDs are replaced with their original values.
+        Decodes an AXML file of the APK into an ElementTree close to the original XML.
+        All resource IDs are replaced with their original values while the tree is built,
+        unless resolve is False.
+        Returns the tree and its namespaces, or None if the file can't be decoded.
         """
         if path is None:
             # sometimes it is not possible to find the file (might be because of obfuscation)
             # _realPathFromTypeAndName will have returned None
             return
-        file_content = self._getApkFileContent(path)
-        if file_content is None:
+        info = self._getApkFileInfo(path)
+        if info is None:
             return
-        bad_xml = AXMLPrinter(self.apk.open(path, "r").read()).get_xml().decode()
-        # find all @XXXXXXXX resource IDs
-        # avoid converting those which are not android:value="@XXXXXXXX"
-        rsc_ids = set(re.findall(r"(@[\dA-F]{8})", bad_xml))
-        for rid in rsc_ids:
-            # replace the IDs with the correct resource name
-            # if it's asked for the resource value
-            resolve = bad_xml.find(f"value\"={rid}") != -1
-            bad_xml = bad_xml.replace(rid, self._getResource(rid, resolve=resolve))
-        return StringIO(bad_xml)
+        # the content is read even on a cache hit, it is the key of the cache
+        file_content = self._getApkFileContent(info)
+        key = None
+        if self.cache is not None:
+            digests = [hashlib.sha256(file_content).hexdigest()]
+            if resolve:
+                # resolved files also depend on the resource table
+                digests.append(self._getApkFileDigest("resources.arsc"))
+            key = self.cache.key("xml" if resolve else "raw-xml", *digests)
+            data = self.cache.get(key)
+            if data is not None:
+                if data["xml"] is None:
+                    # not a valid AXML file
+                    return
+                try:
+                    return ET.ElementTree(ET.fromstring(data["xml"])), data["namespaces"]
+                except ET.ParseError:
+                    # decoded text can't always be written back as XML, decode it again
+                    pass
+        if not resolve:
+            # the IDs will be resolved by _attrValue when the attributes are read
+            xml = buildTree(file_content)
+        else:
+            # replace the IDs with the correct resource names
+            # only android:value="@XXXXXXXX" attributes are resolved to their string value
+            xml = buildTree(file_content, lambda rid, isValue: self._getResource(rid, resolve=isValue))
+        if key is not None:
+            data = {"xml": None}
+            if xml is not None:
+                data = {"xml": ET.tostring(xml[0].getroot(), encoding="unicode"), "namespaces": xml[1]}
+            self.cache.put(key, data)
+        return xml
 
     def _loadManifest(self):
         """
         Initializes the manifest's tree and root objects and loads the namespaces.
         """
-        path = self._getCleanXML("AndroidManifest.xml")
-        if path is None:
+        # the resource IDs are kept so the resource table is not needed to load the manifest
+        xml = self._getCleanXML("AndroidManifest.xml", resolve=False)
+        if xml is None:
             # this means we don't have a valid APK but a simple ZIP file
             # error will propagate
-            self.apk = None
+            self.close()
             return
-        # here we have a clean manifest in a virtual file
-        self.namespaces = dict([node for _, node in ET.iterparse(path, events=['start-ns'])])
-        # because it's the same file object, we have to rewind to the beginning before parsing again
-        path.seek(0)
-        self.tree = ET.parse(path)
+        self.tree, self.namespaces = xml
         self.root = self.tree.getroot()
+        self._indexComponents()
 
+    def _attrValue(self, elm, attr):
+        """
+        Reads the value of an attribute, replacing a resource ID with the correct resource name.
+        Only android:value attributes are resolved to their string value.
+        """
+        res = super()._attrValue(elm, attr)
+        if res and res.startswith("@") and RESOURCE_ID_PATTERN.fullmatch(res):
+            res = self._getResource(res, resolve=attr.split(":")[-1] == "value")
+        return res
+
+    @memoized
     def customPermissions(self):
         """
         Lists all the custom permissions defined by the application.
@@ -105,7 +265,6 @@ class APKParser(Parser):
 
         In the case of APK, custom permission protection level is an Int.
         """
-        CustomPerm = namedtuple("CustomPerm", "name protectionLevel")
         res = []
         for perm in self.root.findall('permission'):
             name = self._getattr(perm, "android:name")
@@ -123,26 +282,13 @@ class APKParser(Parser):
         Sometimes resources are named differently in the ZIP.
         Ex: res/xml/network_security_config.xml => res/a7.xml
         """
-        if package_name is None:
-            # I don't know how to handle the case when there are multiple package names yet
-            package_name = self.rsc.get_packages_names()[0]
-        # recover the rid from the resource type and filename
-        rid = self.rsc.resource_keys[package_name][resType].get(name)
-        if rid is None:
-            return
-        # get_res_configs returns a list of tuples
-        # we only care about the first element of this list
-        # and the second element of the tuple is a ARSCResTableEntry
-        # https://github.com/appknox/pyaxmlparser/blob/d111a4fc6330a0c293ffc2f114af360eb78ad2ef/pyaxmlparser/arscutil.py#L509
-        # the key attribute holds a ARSCResStringPoolRef
-        # https://github.com/appknox/pyaxmlparser/blob/d111a4fc6330a0c293ffc2f114af360eb78ad2ef/pyaxmlparser/arscutil.py#L580
-        # the get_data_value function gives us what we are looking for
-        real_path = self.rsc.get_res_configs(rid)[0][1].key.get_data_value()
-        return real_path
+        return self.resources.getRealPath(resType, name, package_name)
 
+    @memoized
     def getNetworkSecurityConfigFile(self):
         """
-        Extracts the network_security_config file content.
+        Decodes the network_security_config file.
+        Returns the tree and its namespaces, which NetworkSecParser accepts instead of a file.
         """
         filename = self.networkSecurityConfig()
         if filename is None:
@@ -156,8 +302,6 @@ class APKParser(Parser):
         Convenient function to gather all rules in a backup configuration file element.
         https://developer.android.com/guide/topics/data/autobackup#xml-include-exclude
         """
-        # requireFlags is only for type "include"
-        Rule = namedtuple("Rule", "type domain path requireFlags")
         res = []
         for e in root:
             t = e.tag
@@ -167,6 +311,7 @@ class APKParser(Parser):
             res.append(Rule(t, d, p, rf))
         return res
 
+    @memoized
     def getFullBackupContentRules(self):
         """
         Parses the fullBackupContent file and returns all the rules defined in there.
@@ -181,24 +326,21 @@ class APKParser(Parser):
             if xml is None:
                 # sometimes it is not possible to find the file (might be because of obfuscation)
                 return res
-            root = ET.parse(xml).getroot()
-            res = self.getAllRules(root)
+            res = self.getAllRules(xml[0].getroot())
         return res
 
+    @memoized
     def getDataExtractionRulesContent(self):
         """
         Parses the dataExtractionRules file.
         returns None if this file does not exist.
         https://developer.android.com/guide/topics/data/autobackup#xml-syntax-android-12
         """
-        # disableIfNoEncryptionCapabilities is only for <cloud-Backup>
-        ExtractionRules = namedtuple("ExtractionRules", "cloudBackupRules disableIfNoEncryptionCapabilities "
-                                                        "deviceTransferRules")
         filename = self.dataExtractionRules()
         if filename is not None:
             path = self._realPathFromTypeAndName("xml", unformatFilename(filename).split(".")[0])
             xml = self._getCleanXML(path)
-            root = ET.parse(xml).getroot()
+            root = xml[0].getroot()
             cloudBackupRules = []
             disableIfNoEncryptionCapabilities = None
             deviceTransferRules = []
@@ -213,24 +355,38 @@ class APKParser(Parser):
                 deviceTransferRules = self.getAllRules(dt)
             return ExtractionRules(cloudBackupRules, disableIfNoEncryptionCapabilities, deviceTransferRules)
 
+    @memoized
     def hasFile(self, path):
         """
         Simply checks if a file is present in the ZIP archive.
         """
-        return path in self.apk.namelist()
+        return self._getApkFileInfo(path) is not None
+
+    def _strings(self):
+        """
+        Lists the resolved values of all the resources of type string.
+        """
+        if self.resources is None:
+            return []
+        return self.resources.getStringValues()
 
+    @memoized
     def searchInStrings(self, pattern):
         """
         Searches for the occurrences of a pattern in all the resources of type string.
         """
-        res = []
-        if self.rsc:
-            # I don't know how to handle the case when there are multiple package names yet
-            package_name = self.rsc.get_packages_names()[0]
-            # get_resolved_strings does not recompute all the strings every time, so it's fine
-            for s in self.rsc.get_resolved_strings()[package_name]["DEFAULT"].values():
-                if s is None:
-                    continue
-                if re.search(pattern, s, re.IGNORECASE):
-                    res.append(s)
-        return res
+        regex = re.compile(pattern, re.IGNORECASE)
+        return [s for s in self._strings() if regex.search(s)]
+
+    def scanStrings(self, scanner):
+        """
+        Searches for all the patterns of a StringScanner in a single pass over the resources of type string.
+        Returns the matches tagged by pattern id.
+        """
+        # the checks sharing a scanner can run at the same time, the strings are only scanned by the first one
+        with self._loadLock:
+            return self._scanStrings(scanner)
+
+    @memoized
+    def _scanStrings(self, scanner):
+        return scanner.scan(self._strings())
@@ -0,0 +1,74 @@
+from .config import ASSET_LINKS_TIMEOUT, ASSET_LINKS_CONCURRENCY
+from concurrent.futures import ThreadPoolExecutor
+from requests.adapters import HTTPAdapter
+import requests
+import logging
+
+logger = logging.getLogger("MainLogger")
+
+ASSET_LINKS_URL = "https://{host}/.well-known/assetlinks.json"
+
+
+class AssetLinksVerifier:
+    """
+    Checks if the Digital Asset Links JSON files of app link hosts are publicly available.
+    The hosts are verified concurrently, at most `concurrency` requests at a time, through a single session
+    so the connections are pooled. A host that does not answer within `timeout` seconds is reported as not verified
+    instead of blocking the analysis.
+    The results are kept in an AssetLinksCache if one is given, except when the host could not be reached.
+    """
+
+    def __init__(self, cache=None, timeout=ASSET_LINKS_TIMEOUT, concurrency=ASSET_LINKS_CONCURRENCY,
+                 url=ASSET_LINKS_URL):
+        """
+        :param url: template of the URL of the file, formatted with the host
+        """
+        self.cache = cache
+        self.timeout = timeout
+        self.concurrency = concurrency
+        self.url = url
+
+    def _newSession(self):
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=self.concurrency, pool_maxsize=self.concurrency)
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+        return session
+
+    def _fetch(self, session, url):
+        """
+        Returns the status code of the file, or None if the host could not be reached.
+        """
+        try:
+            return session.get(url, timeout=self.timeout).status_code
+        except requests.exceptions.RequestException as e:
+            logger.debug(f"{url}: {e}")
+
+    def _verify(self, session, host):
+        url = self.url.format(host=host)
+        key = None
+        if self.cache is not None:
+            key = self.cache.key(url)
+            active = self.cache.get(key)
+            if active is not None:
+                return active
+        status = self._fetch(session, url)
+        if status is None:
+            # might be temporary, not cached
+            return False
+        active = status == 200
+        if self.cache is not None:
+            self.cache.put(key, active)
+        return active
+
+    def verify(self, hosts):
+        """
+        Verifies all the hosts and returns a {host: True|False} dict.
+        requests is blocking, the hosts are verified on a pool of threads.
+        """
+        hosts = list(hosts)
+        if not hosts:
+            return {}
+        with self._newSession() as session, ThreadPoolExecutor(min(self.concurrency, len(hosts))) as executor:
+            results = executor.map(lambda host: self._verify(session, host), hosts)
+            return dict(zip(hosts, results))
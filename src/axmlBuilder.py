@@ -0,0 +1,97 @@
+import xml.etree.ElementTree as ET
+import re
+
+# Same sanitization as pyaxmlparser.axmlprinter.AXMLPrinter, so the trees are identical to the ones
+# obtained by parsing its XML output.
+# https://www.w3.org/TR/xml/#charsets
+INVALID_VALUE_CHARS = re.compile('[^\u0020-\uD7FF\u0009\u000A\u000D\uE000-\uFFFD\U00010000-\U0010FFFF]')
+INVALID_NAME_CHARS = re.compile(r"[^a-zA-Z0-9._-]")
+# resource IDs of the application (system resources are formatted as @android:XXXXXXXX)
+RESOURCE_ID_PATTERN = re.compile(r"@[\dA-F]{8}")
+
+
+def _fixName(name):
+    """
+    Makes an element or attribute name valid, the way AXMLPrinter does.
+    """
+    if not name[0].isalpha() and name[0] != "_":
+        name = f"_{name}"
+    if name.startswith("android:"):
+        # broken manifests use the prefix in the name instead of a namespace URI
+        name = name[len("android:"):]
+    return INVALID_NAME_CHARS.sub("_", name)
+
+
+def _fixValue(value):
+    """
+    Cleans an attribute value, the way AXMLPrinter does.
+    Strings are read until the first null byte like aapt does.
+    """
+    if "\x00" in value:
+        value = value[:value.find("\x00")]
+    return INVALID_VALUE_CHARS.sub("_", value)
+
+
+def buildTree(raw, resolve=None):
+    """
+    Decodes a binary AXML file directly into an ElementTree.
+    The chunks are read with pyaxmlparser's AXMLParser and the elements are created as they come,
+    without producing the XML text and parsing it again.
+
+    :param raw: the content of the AXML file
+    :param resolve: function transforming a resource ID of the form @7F0A01BF. It is called with the ID and
+                    a boolean telling if the attribute is an android:value (which should be resolved to its value).
+    :return: the ElementTree and the namespaces as a {prefix: uri} dict, or None if the file is not a valid AXML
+    """
+    # pyaxmlparser is slow to import, so only when a file is decoded
+    from pyaxmlparser.axmlparser import AXMLParser
+    from pyaxmlparser.utils import format_value
+    import pyaxmlparser.constants as const
+    axml = AXMLParser(raw)
+    root = None
+    namespaces = {}
+    # number of namespace mappings already merged into namespaces
+    known = 0
+    cur = []
+    while axml.is_valid():
+        event = next(axml)
+
+        if event == const.START_TAG:
+            if len(axml.namespaces) != known:
+                namespaces.update(axml.nsmap)
+                known = len(axml.namespaces)
+            uri = axml.namespace
+            tag = _fixName(axml.name)
+            elem = ET.Element(f"{{{uri}}}{tag}" if uri else tag)
+            for i in range(axml.getAttributeCount()):
+                uri = axml.getAttributeNamespace(i)
+                name = _fixName(axml.getAttributeName(i))
+                value = _fixValue(format_value(axml.getAttributeValueType(i), axml.getAttributeValueData(i),
+                                               lambda _: axml.getAttributeValue(i)))
+                if resolve is not None and RESOURCE_ID_PATTERN.fullmatch(value):
+                    value = resolve(value, name == "value")
+                elem.set(f"{{{uri}}}{name}" if uri else name, value)
+
+            if root is None:
+                root = elem
+            elif not cur:
+                # we lost the root, the AXML is malformed
+                break
+            else:
+                cur[-1].append(elem)
+            cur.append(elem)
+
+        elif event == const.END_TAG:
+            if cur:
+                cur.pop()
+
+        elif event == const.TEXT:
+            if cur:
+                cur[-1].text = axml.text
+
+        elif event == const.END_DOCUMENT:
+            break
+
+    if root is None:
+        return
+    return ET.ElementTree(root), namespaces
@@ -0,0 +1,199 @@
+from .api import getParser, analyzeParser
+from .resultCache import ResultCache, DecodedCache
+from .console import Console, HeadlessConsole
+from .profiler import Profiler
+from .utils import writeJSON
+from concurrent.futures import wait, FIRST_COMPLETED
+from collections import namedtuple
+import xml.etree.ElementTree as ET
+import contextlib
+import logging
+import copy
+import time
+import os
+
+logger = logging.getLogger("MainLogger")
+
+# error is None if the analysis succeeded, output is the JSON result file
+BatchResult = namedtuple("BatchResult", "path output error duration")
+
+
+def analyze(args, packageName=None, cache=None, decodedCache=None, source=None):
+    """
+    Runs all the checks on args.path, or on source if given (see getParser), and returns the JSON results.
+    If a ResultCache is given, the results of a previous analysis of the same file are reused when possible,
+    otherwise the new results are stored in it. The cached results are not rendered, it is only meant for the
+    headless analyses.
+    The DecodedCache is given to the parser.
+    """
+    # the same analysis as the library API, rendered unless --headless
+    console = HeadlessConsole() if getattr(args, "headless", False) else Console()
+    key = None
+    if cache is not None:
+        key = cache.key(args.path, args)
+        res = cache.getResults(key)
+        if res is not None:
+            if args.json is not None:
+                writeJSON(args.json, res)
+            return res
+    # the manifest is decoded before the checks run, it is measured too
+    profiler = Profiler() if getattr(args, "profile", False) else None
+    with contextlib.closing(getParser(args.path if source is None else source, decodedCache, profiler)) as parser:
+        res = analyzeParser(parser, args, console, packageName, profiler).results
+    if cache is not None:
+        cache.putResults(key, res)
+    return res
+
+
+def collectPaths(paths, fileList=None):
+    """
+    Expands the inputs of a batch into a list of files.
+    Directories are searched recursively for APK files.
+    A file list contains one path per line, blank lines and lines starting with # are ignored.
+    """
+    paths = list(paths)
+    if fileList is not None:
+        with open(fileList) as f:
+            paths += [line.strip() for line in f if line.strip() and not line.startswith("#")]
+    res = []
+    for path in paths:
+        if os.path.isdir(path):
+            for root, _, files in sorted(os.walk(path)):
+                res += [os.path.join(root, f) for f in sorted(files) if f.lower().endswith(".apk")]
+        else:
+            res.append(path)
+    return res
+
+
+def _outputPaths(paths, outputDir):
+    """
+    Names the JSON result file of each input after its file name, without collisions.
+    Without outputDir, no file is written.
+    """
+    if outputDir is None:
+        return [None] * len(paths)
+    res = []
+    used = set()
+    for path in paths:
+        stem = os.path.splitext(os.path.basename(path))[0]
+        name, i = stem, 1
+        while name in used:
+            name = f"{stem}-{i}"
+            i += 1
+        used.add(name)
+        res.append(os.path.join(outputDir, f"{name}.json"))
+    return res
+
+
+def _initWorker():
+    """
+    Silences the logs of the worker processes, the analyses are headless and only the JSON results are kept.
+    """
+    logging.getLogger("MainLogger").setLevel(logging.CRITICAL + 1)
+    logging.getLogger("pyaxmlparser").setLevel(logging.CRITICAL + 1)
+
+
+def analyzeFile(path, output, args, keep=False):
+    """
+    Runs all the checks on a single file and writes the JSON result to output (if not None).
+    Runs in a worker process so the arguments and the result must be picklable.
+    Returns the BatchResult and the JSON result if keep is True (None otherwise).
+    """
+    start = time.perf_counter()
+    args = copy.copy(args)
+    args.path = path
+    args.json = output
+    # nobody watches the workers
+    args.headless = True
+    cache, decodedCache = (None, None) if args.no_cache else (ResultCache(), DecodedCache())
+    if args.profile:
+        # the analysis must run to be measured
+        cache = None
+    jres = None
+    try:
+        jres = analyze(args, cache=cache, decodedCache=decodedCache)
+        error = None
+    except FileNotFoundError:
+        error = "Invalid file name !"
+    except ET.ParseError:
+        error = "Invalid file !"
+    except Exception as e:
+        error = f"{type(e).__name__}: {e}"
+    return BatchResult(path, None if error else output, error, time.perf_counter() - start), jres if keep else None
+
+
+def jsonLinesRecord(result, jres):
+    """
+    Record of the JSON Lines output of an analyzed file: its BatchResult and its JSON result.
+    """
+    return dict(result._asdict(), result=jres)
+
+
+def runBatch(paths, args, outputDir=None, jobs=None, sink=None):
+    """
+    Analyzes many files on a pool of processes.
+    One JSON result per file is written in outputDir, and/or appended to a JSONLinesSink as soon as it is ready.
+    With a sink, only the failures are kept in the summary so the memory does not grow with the number of files.
+    Returns the summary of the run, with the throughput and the failures.
+    """
+    # multiprocessing is only imported for the batches
+    from concurrent.futures import ProcessPoolExecutor
+    if outputDir is not None:
+        os.makedirs(outputDir, exist_ok=True)
+    jobs = jobs or os.cpu_count()
+    start = time.perf_counter()
+    results = [None] * len(paths) if sink is None else None
+    failures = []
+    inputs = enumerate(zip(paths, _outputPaths(paths, outputDir)))
+    with ProcessPoolExecutor(max_workers=jobs, initializer=_initWorker) as executor:
+        pending = {}
+        while True:
+            # a few files in advance for each worker, the finished ones are released
+            for i, (path, output) in inputs:
+                pending[executor.submit(analyzeFile, path, output, args, sink is not None)] = i
+                if len(pending) >= 2 * jobs:
+                    break
+            if not pending:
+                break
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            # done is a set, the input order is kept among the files finished at the same time
+            for future in sorted(done, key=pending.get):
+                i = pending.pop(future)
+                res, jres = future.result()
+                if res.error is None:
+                    logger.info(f"{res.path}: {res.output or 'done'} ({res.duration:.2f}s)")
+                else:
+                    logger.error(f"{res.path}: {res.error}")
+                    failures.append({"path": res.path, "error": res.error})
+                if sink is not None:
+                    sink.write(jsonLinesRecord(res, jres))
+                else:
+                    # keep the input order
+                    results[i] = res
+    elapsed = time.perf_counter() - start
+    summary = {
+        "total": len(paths),
+        "analyzed": len(paths) - len(failures),
+        "failed": len(failures),
+        "elapsed": elapsed,
+        "throughput": len(paths) / elapsed if elapsed else 0.0,
+        "jobs": jobs,
+        "failures": failures
+    }
+    if results is not None:
+        summary["results"] = [e._asdict() for e in results]
+    return summary
+
+
+def showSummary(summary, jsonPath=None):
+    """
+    Displays the summary of a batch run, and writes it in JSON format if a file is given.
+    """
+    logger.info(f"\nAnalyzed {summary['analyzed']}/{summary['total']} files in {summary['elapsed']:.2f}s "
+                f"({summary['throughput']:.2f} files/s, {summary['jobs']} processes)")
+    if summary["failures"]:
+        logger.warning(f"{summary['failed']} failure(s):")
+        for e in summary["failures"]:
+            logger.warning(f"\t{e['path']}: {e['error']}")
+    if jsonPath is not None:
+        writeJSON(jsonPath, summary)
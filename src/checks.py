@@ -0,0 +1,75 @@
+from collections import namedtuple
+
+# Registry of the checks run by Analyzer.runAllTests.
+# Each check declares what it costs and what it reads, so a pipeline can only pay for the checks it needs:
+# the resource table is only decoded and external tools are only launched if a selected check requires it.
+
+# cost classes, from the cheapest to the most expensive
+CHEAP = "cheap"                 # reads the manifest only
+DECODING = "decoding"           # decodes the resource table or other binary XML files of the APK
+SUBPROCESS = "subprocess"       # launches an external tool
+NETWORK = "network"             # sends requests over the network
+
+# data needed by the checks
+MANIFEST = "manifest"           # the (decoded) AndroidManifest.xml
+ARCHIVE = "archive"             # the list of files in the APK
+RESOURCES = "resources"         # resources.arsc and the XML files it points to
+STRINGS = "strings"             # the values of the string resources
+APKSIGNER = "apksigner"         # the apksigner binary
+DEVICE = "device"               # a device connected with ADB (only with --adb), waits for the user
+INTERNET = "internet"           # access to the hosts declared by the application
+
+# a check of the registry, method is the name of the Analyzer method running it
+Check = namedtuple("Check", "name method cost needs description")
+
+# in execution order
+CHECKS = [
+    Check("apk-info", "showApkInfo", CHEAP, (MANIFEST,),
+          "Package, versions, components, libraries and features"),
+    Check("signature", "verifySignature", SUBPROCESS, (APKSIGNER,),
+          "Signature verification with apksigner"),
+    Check("permissions", "analyzeRequiredPerms", CHEAP, (MANIFEST,),
+          "Required permissions"),
+    Check("custom-permissions", "analyzeCustomPerms", CHEAP, (MANIFEST,),
+          "Custom permissions definition"),
+    Check("backup", "analyzeBackupFeatures", DECODING, (MANIFEST, RESOURCES, DEVICE),
+          "ADB and Auto backup, backup rules and agent"),
+    Check("debuggable", "isDebuggable", CHEAP, (MANIFEST, ARCHIVE),
+          "Debug mode"),
+    Check("network-security-config", "getNetworkConfigFile", DECODING, (MANIFEST, RESOURCES),
+          "Network security config trust anchors and pinning"),
+    Check("cleartext-traffic", "isCleartextTrafficAllowed", DECODING, (MANIFEST, RESOURCES),
+          "Cleartext traffic"),
+    Check("exported-components", "getExportedComponents", CHEAP, (MANIFEST,),
+          "Exported components"),
+    Check("intent-filters", "analyzeIntentFilters", CHEAP, (MANIFEST,),
+          "Intent filters and deep links"),
+    Check("app-links", "analyzeAppLinks", NETWORK, (MANIFEST, INTERNET),
+          "App links and their Digital Asset Links files"),
+    Check("exported-components-permissions", "analyzeExportedComponent", CHEAP, (MANIFEST,),
+          "Permissions of the exported components"),
+    Check("unexported-providers", "analyzeUnexportedProviders", CHEAP, (MANIFEST,),
+          "Unexported providers granting URI permissions"),
+    Check("firebase", "checkForFirebaseURL", DECODING, (STRINGS,),
+          "Firebase URLs"),
+    Check("sensitive-strings", "checkForSensitiveStrings", DECODING, (STRINGS,),
+          "API keys, buckets and internal hosts in the strings"),
+    Check("custom-permissions-usage", "analyzeCustomPermsUsage", CHEAP, (MANIFEST,),
+          "Usage of the custom permissions"),
+    Check("launch-mode", "analyzeActivitiesLaunchMode", CHEAP, (MANIFEST,),
+          "Task hijacking through the activities launch mode"),
+]
+
+
+def selectChecks(only=None, skip=None):
+    """
+    Returns the checks to run, in execution order.
+    :param only: names of the checks to run (all by default)
+    :param skip: names of the checks not to run
+    Raises a ValueError if a name is unknown.
+    """
+    names = {c.name for c in CHECKS}
+    unknown = [n for n in (only or []) + (skip or []) if n not in names]
+    if unknown:
+        raise ValueError(f"Unknown check(s): {', '.join(unknown)}")
+    return [c for c in CHECKS if (only is None or c.name in only) and c.name not in (skip or [])]
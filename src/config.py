@@ -1,3 +1,5 @@
+import os
+
 # Config file for external binaries. Useful for Docker integration
 # <name> : <list of arguments to launch the executable> (customizable)
 # by default it is assumed the binaries are in your $PATH
@@ -8,3 +10,28 @@ EXTERNAL_BINARIES = {
 
 # default backup file location for ADB backups
 ADB_BACKUP_PATH = "/tmp/backup.tar"
+
+# cache of the JSON results, see src/resultCache.py
+RESULT_CACHE_PATH = os.path.join(os.path.expanduser("~"), ".cache", "amande", "results")
+# size in bytes over which the least recently used results are removed
+RESULT_CACHE_MAX_SIZE = 256 * 1024 * 1024
+
+# cache of the decoded XML files and resource tables of the APKs, see src/resultCache.py
+DECODED_CACHE_PATH = os.path.join(os.path.expanduser("~"), ".cache", "amande", "decoded")
+DECODED_CACHE_MAX_SIZE = 512 * 1024 * 1024
+
+# number of threads running the checks of an analysis at the same time, see src/scheduler.py
+CHECK_THREADS = 8
+
+# Digital Asset Links verification of the app links, see src/assetLinks.py
+# timeout in seconds of the connection and of each read
+ASSET_LINKS_TIMEOUT = 5
+# maximum number of requests sent at the same time
+ASSET_LINKS_CONCURRENCY = 16
+# cache of the verification results per host, they expire after ASSET_LINKS_CACHE_TTL seconds
+ASSET_LINKS_CACHE_PATH = os.path.join(os.path.expanduser("~"), ".cache", "amande", "assetlinks")
+ASSET_LINKS_CACHE_MAX_SIZE = 16 * 1024 * 1024
+ASSET_LINKS_CACHE_TTL = 24 * 60 * 60
+
+# Unix socket of the analysis daemon, see src/daemon.py and client.py
+DAEMON_SOCKET_PATH = os.path.join(os.path.expanduser("~"), ".cache", "amande", "daemon.sock")
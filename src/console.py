@@ -0,0 +1,61 @@
+from .utils import printTestInfo, printSubTestInfo
+from .scheduler import display
+from termcolor import colored
+import logging
+
+# logger of the headless analyses, it never emits anything
+_silentLogger = logging.getLogger("MainLogger.headless")
+_silentLogger.setLevel(logging.CRITICAL + 1)
+_silentLogger.propagate = False
+
+
+class Console:
+    """
+    Terminal rendering of an analysis: titles, colors, tables and messages.
+    The checks only go through it to display their results, the JSON results are filled whatever the console.
+    When the checks run at the same time, what they display is put in order by the scheduler (see runInOrder).
+    """
+    logger = logging.getLogger("MainLogger")
+    # False if nothing is displayed
+    rendering = True
+
+    def title(self, title):
+        display(printTestInfo, title)
+
+    def subtitle(self, title):
+        display(printSubTestInfo, title)
+
+    def print(self, *values):
+        display(print, *values)
+
+    def colored(self, text, color=None, attrs=None):
+        return colored(text, color, attrs=attrs)
+
+    def tabulate(self, table, headers):
+        # slow to import, not needed by the analyses without tables
+        from tabulate import tabulate
+        return tabulate(table, headers, tablefmt="fancy_grid")
+
+
+class HeadlessConsole(Console):
+    """
+    Console of the headless mode, when only the JSON results are wanted.
+    Nothing is formatted nor written, and the messages of the logger are dropped before being formatted.
+    """
+    logger = _silentLogger
+    rendering = False
+
+    def title(self, title):
+        pass
+
+    def subtitle(self, title):
+        pass
+
+    def print(self, *values):
+        pass
+
+    def colored(self, text, color=None, attrs=None):
+        return text
+
+    def tabulate(self, table, headers):
+        return ""
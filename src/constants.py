@@ -73,3 +73,24 @@ protection_levels = {
     8000: "vendorPrivileged",
     200: "verifier"
 }
+
+# indicators looked for in the string resources of an APK
+# the order matters: when two indicators match at the same position, the first one wins
+# they are case-sensitive, so the key formats do not match lowercase text: only the host names ignore the case
+string_indicators = {
+    "Firebase storage": r"(?i:[\w.-]+\.appspot\.com)",
+    "Google API key": r"AIza[\w-]{35}",
+    "Google OAuth client ID": r"[\d]+-[a-z\d]{32}\.apps\.googleusercontent\.com",
+    "Google Cloud Storage bucket": r"(?i:(?:[\w.-]+\.)?storage\.googleapis\.com(?:/[\w.-]+)?)",
+    "AWS access key ID": r"\b(?:AKIA|ASIA)[A-Z\d]{16}\b",
+    "AWS S3 bucket": r"(?i:[\w.-]+\.s3(?:[.-][\w-]+)?\.amazonaws\.com|s3://[\w.-]+)",
+    "Azure storage": r"(?i:[\w-]+\.(?:blob|file|queue|table)\.core\.windows\.net)",
+    "Slack webhook": r"(?i:https://hooks\.slack\.com/services/[\w/]+)",
+    "Slack token": r"\bxox[abposr]-[\w-]{10,}",
+    "Stripe secret key": r"\b[rs]k_live_[\dA-Za-z]{16,}",
+    "Private key": r"-----BEGIN (?:RSA |EC |DSA |OPENSSH |PGP )?PRIVATE KEY",
+    "Private IP address": r"\b(?:10(?:\.\d{1,3}){3}|192\.168(?:\.\d{1,3}){2}|172\.(?:1[6-9]|2\d|3[01])(?:\.\d{1,3}){2})\b",
+    "Internal hostname": r"(?i:https?://[\w.-]+\.(?:internal|intranet|corp|local|lan)\b)",
+}
+# searched on its own by checkForFirebaseURL: the URL can follow any text, and the match of an indicator can't hide it
+FIREBASE_URL_PATTERN = r"https://.*firebaseio.com"
@@ -0,0 +1,198 @@
+from .utils import CustomFormatter
+import socketserver
+import contextlib
+import traceback
+import threading
+import tempfile
+import termcolor
+import logging
+import base64
+import signal
+import socket
+import json
+import sys
+import os
+
+# environment variables of the client deciding the colors and the width of the output
+CLIENT_ENV = ["FORCE_COLOR", "NO_COLOR", "ANSI_COLORS_DISABLED", "TERM", "COLUMNS"]
+
+
+class _Output:
+    """
+    Output of a job, sent back to the client.
+    The writes to stdout and stderr are kept in a single list so the client writes them in the same order.
+    It is a terminal if the output of the client is one, so the colors are the same as without the daemon.
+    """
+
+    def __init__(self, chunks, fd, tty):
+        self.chunks = chunks
+        self.fd = fd
+        self.tty = tty
+
+    def write(self, s):
+        # the consecutive writes to the same stream are joined at the end
+        if not self.chunks or self.chunks[-1][0] != self.fd:
+            self.chunks.append((self.fd, []))
+        self.chunks[-1][1].append(s)
+        return len(s)
+
+    def flush(self):
+        pass
+
+    def isatty(self):
+        return self.tty
+
+
+@contextlib.contextmanager
+def _clientContext(request, stdout, stderr):
+    """
+    Runs a job as if it was run by the client: in its working directory, with its environment variables
+    and writing to the given outputs.
+    """
+    cwd = os.getcwd()
+    env = {name: os.environ.get(name) for name in CLIENT_ENV}
+    logger = logging.getLogger("MainLogger")
+    handlers = [h for h in logger.handlers if isinstance(h, logging.StreamHandler)]
+    outputs = sys.stdout, sys.stderr
+    os.chdir(request["cwd"])
+    for name in CLIENT_ENV:
+        os.environ.pop(name, None)
+    os.environ.update({name: value for name, value in request.get("env", {}).items() if name in CLIENT_ENV})
+    # termcolor decides once if the output can be colored
+    termcolor.can_colorize.cache_clear()
+    sys.stdout, sys.stderr = stdout, stderr
+    streams = [h.setStream(stderr) for h in handlers]
+    try:
+        yield
+    finally:
+        sys.stdout, sys.stderr = outputs
+        for h, stream in zip(handlers, streams):
+            h.setStream(stream)
+        for name, value in env.items():
+            if value is None:
+                os.environ.pop(name, None)
+            else:
+                os.environ[name] = value
+        termcolor.can_colorize.cache_clear()
+        os.chdir(cwd)
+
+
+def _exitCode(e):
+    # same as the interpreter when SystemExit is not caught
+    if e.code is None:
+        return 0
+    if isinstance(e.code, int):
+        return e.code
+    print(e.code, file=sys.stderr)
+    return 1
+
+
+def runJob(run, request):
+    """
+    Runs the command line of a client and returns its output (a list of (1 for stdout or 2 for stderr, text)),
+    exit code and result.
+    The request is a dict with the arguments of the command line ("argv"), the working directory of the client
+    ("cwd"), whether its output is a terminal ("tty") and its CLIENT_ENV variables ("env").
+    The content of the file to analyze can be sent base64 encoded in "data", it replaces the "-" path.
+
+    :param run: the function running the command line, main of main.py
+    """
+    chunks = []
+    stdout, stderr = _Output(chunks, 1, request.get("tty", False)), _Output(chunks, 2, request.get("tty", False))
+    argv = list(request["argv"])
+    result = None
+    with tempfile.TemporaryDirectory() as tmpPath, _clientContext(request, stdout, stderr):
+        try:
+            if "data" in request:
+                path = os.path.join(tmpPath, request.get("name", "input"))
+                with open(path, "wb") as f:
+                    f.write(base64.b64decode(request["data"]))
+                argv = [path if arg == "-" else arg for arg in argv]
+            result = run(argv)
+            code = 0
+        except SystemExit as e:
+            code = _exitCode(e)
+        except Exception:
+            traceback.print_exc()
+            code = 1
+    return {"output": [(fd, "".join(parts)) for fd, parts in chunks], "code": code, "result": result}
+
+
+class _JobHandler(socketserver.StreamRequestHandler):
+    """
+    A connection carries one job: a JSON request on a single line, answered by a JSON response on a single line.
+    """
+
+    def handle(self):
+        line = self.rfile.readline()
+        if not line:
+            # only checking that the daemon is listening
+            return
+        try:
+            request = json.loads(line)
+        except ValueError as e:
+            response = {"output": [(2, f"Invalid request: {e}\n")], "code": 2, "result": None}
+        else:
+            # the jobs change the working directory and the outputs of the process, one at a time
+            with self.server.lock:
+                response = runJob(self.server.run, request)
+        self.wfile.write(json.dumps(response, default=str).encode() + b"\n")
+
+
+class AnalysisDaemon(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    """
+    Server running the command lines sent by client.py.
+    The modules stay loaded between the jobs, as well as what they keep in memory (versions of the tools...),
+    so a job only costs the analysis itself.
+    """
+    daemon_threads = True
+
+    def __init__(self, path, run):
+        """
+        :param path: the path of the Unix socket, only the current user can connect to it
+        :param run: the function running a command line, main of main.py
+        """
+        self.run = run
+        self.lock = threading.Lock()
+        super().__init__(path, _JobHandler)
+        os.chmod(path, 0o600)
+
+
+def isListening(path):
+    """
+    Returns True if a daemon is listening on the socket.
+    """
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as s:
+        try:
+            s.connect(path)
+        except OSError:
+            return False
+    return True
+
+
+def serve(path, run):
+    """
+    Runs a daemon on the socket until it is interrupted.
+    """
+    if isListening(path):
+        sys.exit(f"A daemon is already listening on {path}")
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    # left by a daemon which did not stop properly
+    with contextlib.suppress(FileNotFoundError):
+        os.remove(path)
+    logger = logging.getLogger("MainLogger")
+    if not logger.handlers:
+        handler = logging.StreamHandler()
+        handler.setFormatter(CustomFormatter())
+        logger.addHandler(handler)
+    logger.setLevel(logging.INFO)
+    with AnalysisDaemon(path, run) as server:
+        logger.info(f"Listening on {path}")
+        # stopped by kill as well as by Ctrl+C, the socket is removed in both cases
+        signal.signal(signal.SIGTERM, lambda *_: sys.exit(0))
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            os.remove(path)
@@ -1,29 +1,60 @@
 from .config import EXTERNAL_BINARIES, ADB_BACKUP_PATH
-from .utils import (
-    runProc,
-    printSubTestInfo
-)
+from .utils import runProc
+from .console import Console
 from termcolor import colored
-import re
+import contextlib
+import tempfile
 import logging
+import shutil
+import os
+import re
 
 logger = logging.getLogger("MainLogger")
 
 
-def runAPKSigner(min_sdk, path):
+@contextlib.contextmanager
+def localPath(source, lock=None, start=0):
+    """
+    Gives a path to an APK for the external tools.
+    The source is a path, the content of the APK (bytes, bytearray or memoryview) or a seekable binary file object.
+    The last two are written to a temporary file, removed after the with block.
+
+    :param lock: held while a file object is read, if it is shared with other readers
+    :param start: the position of the APK in a file object
+    """
+    if isinstance(source, (str, os.PathLike)):
+        yield os.fspath(source)
+        return
+    with tempfile.NamedTemporaryFile(suffix=".apk") as f:
+        if isinstance(source, (bytes, bytearray, memoryview)):
+            f.write(source)
+        else:
+            with lock or contextlib.nullcontext():
+                source.seek(start)
+                shutil.copyfileobj(source, f)
+        f.flush()
+        yield f.name
+
+
+def runAPKSigner(min_sdk, source, console=Console(), lock=None, start=0):
     """
     Executes APKSigner if available.
-    The output is interpreted and colored.
+    The APKs which are not files (see localPath) are only written to disk if apksigner is installed.
+    The output is interpreted and colored, then displayed by the console.
     Warnings are removed for readability.
     """
-    cmd = EXTERNAL_BINARIES["apksigner"] + ["verify", "--print-certs", "--verbose", "--min-sdk-version",
-                                            str(min_sdk), path]
-    cmdres, err = runProc(cmd)
+    if shutil.which(EXTERNAL_BINARIES["apksigner"][0]) is None:
+        # same as when runProc can't launch it
+        return
+    with localPath(source, lock, start) as path:
+        cmd = EXTERNAL_BINARIES["apksigner"] + ["verify", "--print-certs", "--verbose", "--min-sdk-version",
+                                                str(min_sdk), path]
+        cmdres, err = runProc(cmd)
     pattern_1 = ".*Unauthorized.*not be detected.*$"
     jres = {}
     if cmdres is not None:
-        printSubTestInfo("Output of apksigner")
-        logger.info(colored(f"executed command : {' '.join(cmd)}", "yellow"))
+        console.subtitle("Output of apksigner")
+        console.logger.info(console.colored(f"executed command : {' '.join(cmd)}", "yellow"))
 
         signature_versions = [False, False, False]
         for line in cmdres.decode().splitlines():
@@ -32,27 +63,27 @@ def runAPKSigner(min_sdk, path):
 
             if "key size (bits)" in line:
                 key_size = ["3072", "P-256", "P-384", "P-521", "4096", "8192", "16384"]
-                line = line.replace("1024", colored("1024", "red"))
-                line = line.replace("2048", colored("2048", "yellow"))
+                line = line.replace("1024", console.colored("1024", "red"))
+                line = line.replace("2048", console.colored("2048", "yellow"))
                 for e in key_size:
-                    line = line.replace(e, colored(e, "green"))
+                    line = line.replace(e, console.colored(e, "green"))
 
             if "APK Signature Scheme v2" in line:
                 signature_versions[1] = ("true" in line)
-                line = line.replace("true", colored("true", "green"))
-                line = line.replace("false", colored("false", "yellow"))
+                line = line.replace("true", console.colored("true", "green"))
+                line = line.replace("false", console.colored("false", "yellow"))
 
             if "APK Signature Scheme v3" in line:
                 signature_versions[2] = ("true" in line)
-                line = line.replace("true", colored("true", "green"))
-                line = line.replace("false", colored("false", "yellow"))
+                line = line.replace("true", console.colored("true", "green"))
+                line = line.replace("false", console.colored("false", "yellow"))
 
             if "JAR signing" in line:
                 signature_versions[0] = ("true" in line)
-                line = line.replace("true", colored("true", "green"))
-                line = line.replace("false", colored("false", "yellow"))
+                line = line.replace("true", console.colored("true", "green"))
+                line = line.replace("false", console.colored("false", "yellow"))
 
-            logger.info(line)
+            console.logger.info(line)
 
         jres["signature versions"] = {
             "V1": signature_versions[0],
@@ -60,15 +91,15 @@ def runAPKSigner(min_sdk, path):
             "V3": signature_versions[2]
         }
         if signature_versions[0] and not any(signature_versions[1:]):
-            logger.critical("Your APK is only signed with scheme v1. Unauthorized modification to META-INF jar "
+            console.logger.critical("Your APK is only signed with scheme v1. Unauthorized modification to META-INF jar "
                             "entry will not be detected")
         return jres
 
 
-def downloadAPK(name, new_path):
+def downloadAPK(name):
     """
     Downloads the APK associated to the package name using ADB.
-    The resulting APK is always named base.apk.
+    The APK is read in memory, returns its content.
     """
     cmd = EXTERNAL_BINARIES["adb"] + ["shell", "pm", "path", name]
     cmdres, err = runProc(cmd)
@@ -76,16 +107,18 @@ def downloadAPK(name, new_path):
         logger.error(err.decode().strip())
         return
     logger.info(colored(f"executed command : {' '.join(cmd)}", "yellow"))
-    path = cmdres.strip().split(b':')[1].decode()
+    # the base APK comes first, then the split APKs if any
+    path = cmdres.strip().splitlines()[0].split(b':', 1)[1].decode()
 
-    cmd = EXTERNAL_BINARIES["adb"] + ["pull", path, new_path]
-    logger.info(f"Downloading APK {name} into {new_path}...")
+    # exec-out keeps the binary output as it is
+    cmd = EXTERNAL_BINARIES["adb"] + ["exec-out", "cat", path]
+    logger.info(f"Downloading APK {name}...")
     logger.info(colored(f"executing command : {' '.join(cmd)}", "yellow"))
     cmdres, err = runProc(cmd)
     if cmdres is None or cmdres == b'':
         logger.error(err.decode().strip())
         return
-    return new_path + f"/base.apk"
+    return cmdres
 
 
 def performBackup(name):
@@ -0,0 +1,116 @@
+from .utils import BufferStream
+from zipfile import ZipFile, BadZipFile, ZIP_STORED
+import contextlib
+import struct
+import mmap
+import os
+
+# local file header: signature, flags at offset 6, then the lengths of the name and of the extra field at offset 26
+LOCAL_HEADER_SIGNATURE = b"PK\x03\x04"
+LOCAL_HEADER_SIZE = 30
+FLAG_ENCRYPTED = 0x1
+FLAG_UTF8 = 0x800
+
+
+def _mapSource(source):
+    """
+    Returns a buffer over the whole content of source without reading it, or None if it can't be mapped.
+    Files are memory-mapped: only the pages which are accessed are loaded.
+    """
+    if isinstance(source, (bytes, bytearray, memoryview, mmap.mmap)):
+        return source
+    if isinstance(source, (str, os.PathLike)):
+        with open(source, "rb") as f:
+            return _mapFile(f)
+    with contextlib.suppress(AttributeError, OSError, ValueError):
+        return _mapFile(source)
+
+
+def _mapFile(f):
+    fd = f.fileno()
+    try:
+        return mmap.mmap(fd, 0, access=mmap.ACCESS_READ)
+    except ValueError:
+        # an empty file can't be mapped
+        raise BadZipFile("File is empty")
+
+
+class MappedZip(ZipFile):
+    """
+    ZipFile over a memory-mapped APK or a buffer.
+    The central directory is parsed once when it is opened, like ZipFile. The stored (uncompressed) entries are then
+    given as views of the map without any copy, and the deflated ones are decompressed from the map as they are read.
+    The memory used is proportional to the entries which are read, not to the size of the APK.
+    Seekable streams which can't be mapped are read like with ZipFile.
+    The views point into the map: they must not outlive the archive, which unmaps the APK when it is closed.
+    """
+
+    def __init__(self, source):
+        """
+        :param source: the path of the APK, its content (bytes, bytearray or memoryview) or a seekable binary
+                       file object
+        """
+        # set first: ZipFile.__del__ closes the archive even if the mapping fails
+        self.map = self.buffer = self.stream = None
+        self.ownsMap = False
+        self.map = _mapSource(source)
+        # only the maps created here are closed, not the buffers of the caller
+        self.ownsMap = self.map is not source
+        self.buffer = None if self.map is None else memoryview(self.map).cast("B")
+        self.stream = None if self.buffer is None else BufferStream(self.buffer)
+        try:
+            super().__init__(source if self.stream is None else self.stream)
+        except Exception:
+            self._unmap()
+            raise
+
+    def close(self):
+        """
+        Closes the archive and unmaps the APK.
+        """
+        super().close()
+        self._unmap()
+
+    def _unmap(self):
+        if self.buffer is None:
+            return
+        self.stream.close()
+        self.buffer.release()
+        self.buffer = None
+        if self.ownsMap:
+            try:
+                self.map.close()
+            except BufferError:
+                # some views are still alive, the APK is unmapped when the last one is released
+                pass
+
+    def _dataOffset(self, info):
+        """
+        Returns the offset of the data of an entry, which follows its local header.
+        """
+        offset = info.header_offset
+        if self.buffer[offset:offset + 4] != LOCAL_HEADER_SIGNATURE:
+            raise BadZipFile(f"Bad magic number for file header of {info.filename}")
+        flags, = struct.unpack_from("<H", self.buffer, offset + 6)
+        nameLength, extraLength = struct.unpack_from("<HH", self.buffer, offset + 26)
+        # the same check as ZipFile, the name of the local header must be the one of the central directory
+        name = self.buffer[offset + LOCAL_HEADER_SIZE:offset + LOCAL_HEADER_SIZE + nameLength].tobytes()
+        name = name.decode("utf-8" if flags & FLAG_UTF8 else getattr(self, "metadata_encoding", None) or "cp437")
+        if name != info.orig_filename:
+            raise BadZipFile(f"File name in directory {info.orig_filename!r} and header {name!r} differ.")
+        return offset + LOCAL_HEADER_SIZE + nameLength + extraLength
+
+    def view(self, name):
+        """
+        Returns the content of an entry, as a memoryview of the map for a stored entry (its CRC is not checked)
+        or as bytes for a compressed one.
+        Raises KeyError if there is no such entry, and BadZipFile if the entry is inconsistent or truncated.
+        """
+        info = name if not isinstance(name, str) else self.getinfo(name)
+        if self.buffer is None or info.compress_type != ZIP_STORED or info.flag_bits & FLAG_ENCRYPTED:
+            return self.read(info)
+        start = self._dataOffset(info)
+        view = self.buffer[start:start + info.file_size]
+        if len(view) != info.file_size:
+            raise BadZipFile(f"Truncated file {info.filename}")
+        return view
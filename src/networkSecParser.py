@@ -1,18 +1,17 @@
 from .parser import Parser
-import xml.etree.ElementTree as ET
-from collections import namedtuple
-from .utils import str2Bool
+from .records import Cert, BConfig, DConfig, DomainTrustAnchors, DomainPinSet, DomainPinning
+from .utils import str2Bool, parseXML
 
 
 class NetworkSecParser(Parser):
 
     def __init__(self, path, debuggable=False):
-        # here we have a clean manifest in a virtual file
         self.path = path
-        self.namespaces = dict([node for _, node in ET.iterparse(path, events=['start-ns'])])
-        # because it's the same file object, we have to rewind to the beginning before parsing again
-        path.seek(0)
-        self.tree = ET.parse(path)
+        if isinstance(path, tuple):
+            # already decoded tree and namespaces (see APKParser.getNetworkSecurityConfigFile)
+            self.tree, self.namespaces = path
+        else:
+            self.tree, self.namespaces = parseXML(path)
         self.root = self.tree.getroot()
         self.isDebuggable = debuggable
 
@@ -23,12 +22,11 @@ class NetworkSecParser(Parser):
         It is False by default unless specified in a <debug-overrides> element.
         https://developer.android.com/training/articles/security-config?hl=en#certificates
         """
-        cert = namedtuple("Cert", "src overridePins")
         src = self._getattr(elm, "src")
         overridePins = str2Bool(self._getattr(elm, "overridePins"))
         if overridePins is None:
             overridePins = default
-        return cert(src, overridePins)
+        return Cert(src, overridePins)
 
     def parseTrustAnchors(self, elm, default=False):
         """
@@ -48,12 +46,11 @@ class NetworkSecParser(Parser):
         https://developer.android.com/training/articles/security-config?hl=en#base-config
         Default values are API level dependant.
         """
-        config = namedtuple("BConfig", "cleartextTrafficPermitted trustanchors")
         bc = self.root.find("base-config")
         if bc is not None:
             cleartextTrafficPermitted = str2Bool(self._getattr(bc, "cleartextTrafficPermitted"))
             trustanchors = self.parseTrustAnchors(bc)
-            return config(cleartextTrafficPermitted, trustanchors)
+            return BConfig(cleartextTrafficPermitted, trustanchors)
 
     def getDebugOverrides(self):
         """
@@ -98,7 +95,6 @@ class NetworkSecParser(Parser):
         """
         if elm is None:
             elm = self.root
-        config = namedtuple("DConfig", "cleartextTrafficPermitted domains trustanchors pinset domainConfigs")
         dc = elm.findall("domain-config")
         res = []
         for e in dc:
@@ -110,7 +106,7 @@ class NetworkSecParser(Parser):
             pinset = self.parsePinSet(e)
             # recursive call to handle nested <domain-config> elements
             dcs = self.parseDomainConfig(e)
-            res.append(config(cleartextTrafficPermitted, domains, trustanchors, pinset, dcs))
+            res.append(DConfig(cleartextTrafficPermitted, domains, trustanchors, pinset, dcs))
         return res
 
     def getAllDomains(self, dcs=None, inheritedCT=False, withCT=True):
@@ -143,17 +139,16 @@ class NetworkSecParser(Parser):
         """
         if dcs is None:
             dcs = self.parseDomainConfig()
-        domainConf = namedtuple("DomainConf", "domain trustanchors")
         res = []
         for dc in dcs:
             if len(dc.trustanchors) > 0:
                 # add all domains of this domain config with the defined TA
-                res += [domainConf(e, dc.trustanchors) for e in dc.domains]
+                res += [DomainTrustAnchors(e, dc.trustanchors) for e in dc.domains]
                 # recursive call with defined TA
                 res += self.getDomainsWithTA(dc.domainConfigs, dc.trustanchors)
             else:
                 # add all domains of this domain config with the inherited TA
-                res += [domainConf(e, inheritedTA) for e in dc.domains]
+                res += [DomainTrustAnchors(e, inheritedTA) for e in dc.domains]
                 # recursive call with the inherited TA
                 res += self.getDomainsWithTA(dc.domainConfigs, inheritedTA)
         return res
@@ -165,17 +160,16 @@ class NetworkSecParser(Parser):
         """
         if dcs is None:
             dcs = self.parseDomainConfig()
-        domainConf = namedtuple("DomainConf", "domain pinset")
         res = []
         for dc in dcs:
             if dc.pinset is not None:
                 # add all domains of this domain config with the defined PS
-                res += [domainConf(e, dc.pinset) for e in dc.domains]
+                res += [DomainPinSet(e, dc.pinset) for e in dc.domains]
                 # recursive call with defined PS
                 res += self.getDomainsWithPS(dc.domainConfigs, dc.pinset)
             else:
                 # add all domains of this domain config with the inherited PS
-                res += [domainConf(e, inheritedPS) for e in dc.domains]
+                res += [DomainPinSet(e, inheritedPS) for e in dc.domains]
                 # recursive call with the inherited PS
                 res += self.getDomainsWithPS(dc.domainConfigs, inheritedPS)
         return res
@@ -186,11 +180,10 @@ class NetworkSecParser(Parser):
         """
         domain_with_pinning = [e for e in self.getDomainsWithPS() if e.pinset is not None]
         ta_for_domains = {e.domain: e.trustanchors for e in self.getDomainsWithTA(inheritedTA=inheritedTA)}
-        domainConf = namedtuple("DomainConf", "domain pinset overridePins")
         res = []
         for d in domain_with_pinning:
             # get all the Cert.src with overridePins to True
             overridePins = [c.src for c in ta_for_domains[d.domain] if c.overridePins]
-            res.append(domainConf(d.domain, d.pinset, overridePins))
+            res.append(DomainPinning(d.domain, d.pinset, overridePins))
 
         return res
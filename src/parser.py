@@ -1,20 +1,75 @@
-import xml.etree.ElementTree as ET
 from .utils import (
     str2Bool,
     getResourceTypeName,
-    formatResource
+    formatResource,
+    memoized,
+    parseXML,
+    toStream
+)
+from .records import (
+    Component,
+    Info,
+    UsesLibrary,
+    UsesNativeLibrary,
+    UsesFeature,
+    CustomPerm,
+    ExportedComponents,
+    UniversalLink,
+    CustomPermsComponent
 )
 from itertools import product
-from collections import namedtuple
+from collections import defaultdict
 
 
 class Parser:
 
-    def __init__(self, path):
-        self.namespaces = dict([node for _, node in ET.iterparse(path, events=['start-ns'])])
-        self.tree = ET.parse(path)
+    def __init__(self, source):
+        """
+        :param source: the path of the manifest, its content (bytes, bytearray or memoryview)
+                       or a binary file object
+        """
+        self.tree, self.namespaces = parseXML(toStream(source))
         self.root = self.tree.getroot()
         self.apk = None
+        self._indexComponents()
+
+    def clearCache(self):
+        """
+        Invalidates all the memoized query results.
+        Must be called if the tree is modified after the parser was created.
+        """
+        self._cache = {}
+
+    def close(self):
+        """
+        Releases the file read by the parser, nothing to do for a manifest.
+        """
+
+    def cacheInfo(self):
+        """
+        Returns the hit and miss counters of the memoized queries, with their totals.
+        """
+        stats = dict(getattr(self, "cacheStats", {}))
+        stats["total"] = {
+            "hits": sum(e["hits"] for e in stats.values()),
+            "misses": sum(e["misses"] for e in stats.values())
+        }
+        return stats
+
+    def _attrKey(self, attr):
+        """
+        Expands a prefixed attribute name like "android:name" into its ElementTree form "{uri}name".
+        """
+        if ":" in attr:
+            prefix, uri = attr.split(":", 1)
+            attr = f"{{{self.namespaces[prefix]}}}{uri}"
+        return attr
+
+    def _attrValue(self, elm, attr):
+        """
+        Reads the value of an attribute as written in the XML.
+        """
+        return elm.attrib.get(self._attrKey(attr))
 
     def _getattr(self, elm, attr):
         """
@@ -22,35 +77,68 @@ class Parser:
         Attributes might have a prefix like "@android:"
         If the attribute is a resource (starts with @) the result is formatted in a more intelligible manner.
         """
-        if ":" in attr:
-            prefix, uri = attr.split(":", 1)
-            attr = f"{{{self.namespaces[prefix]}}}{uri}"
-        res = elm.attrib.get(attr)
+        res = self._attrValue(elm, attr)
         if res and res.startswith("@"):
             # resource
             path, name = getResourceTypeName(res)
             res = formatResource(path, name)
         return res
 
+    def _indexComponents(self):
+        """
+        Walks the children of <application> once and indexes them by type and by name.
+        Every component query is answered from this index instead of scanning the tree again.
+        The document order is kept in each bucket so the results are the same as with the XPath queries.
+        If the manifest does not declare the android namespace, the components are only indexed by type.
+        """
+        # the index is rebuilt when a new tree is loaded so the previous results are no longer valid
+        self.clearCache()
+        # component type (tag) -> list of Component
+        self.componentsByType = defaultdict(list)
+        # raw android:name -> list of Component (any type)
+        self.componentsByName = defaultdict(list)
+        # components having at least one intent filter (any type)
+        self.intentFilterComponents = []
+        # without the namespace, only the queries reading an android: attribute fail, not the parsing
+        android = self.namespaces.get("android") is not None
+        nameKey = self._attrKey("android:name") if android else None
+        exportedKey = self._attrKey("android:exported") if android else None
+        for application in self.root.findall("application"):
+            for e in application:
+                rawName = e.attrib.get(nameKey)
+                component = Component(e, e.tag, self._getattr(e, "android:name") if android else None, rawName,
+                                      e.attrib.get(exportedKey), e.findall("intent-filter"))
+                self.componentsByType[e.tag].append(component)
+                if rawName is not None:
+                    self.componentsByName[rawName].append(component)
+                if component.intentFilters:
+                    self.intentFilterComponents.append(component)
+
+    def _componentsWithAttr(self, component, attr, value):
+        """
+        Lists the indexed components of a given type whose raw attribute is equal to value.
+        """
+        key = self._attrKey(attr)
+        return [c for c in self.componentsByType.get(component, []) if c.element.attrib.get(key) == value]
+
+    @memoized
     def getApkInfo(self):
         """
         List useful information found in the <manifest> element.
         https://developer.android.com/guide/topics/manifest/manifest-element
         The information is package, version code and version name.
         """
-        # use a namedtuple for more readable access to important attributes
-        Info = namedtuple("Info", "package versionCode versionName")
         package = self._getattr(self.root, "package")
         versionCode = self._getattr(self.root, "android:versionCode")
         versionName = self._getattr(self.root, "android:versionName")
         return Info(package, versionCode, versionName)
 
+    @memoized
     def usesLibrary(self):
         """
         Parses the libraries used by the application.
         https://developer.android.com/guide/topics/manifest/uses-library-element
         """
-        UsesLibrary = namedtuple("UsesLibrary", "name required")
         res = []
         for e in self.root.findall("application/uses-library"):
             name = self._getattr(e, "android:name")
@@ -61,12 +149,12 @@ class Parser:
             res.append(UsesLibrary(name, required))
         return res
 
+    @memoized
     def usesNativeLibrary(self):
         """
         Parses the native libraries used by the application.
         https://developer.android.com/guide/topics/manifest/uses-native-library-element
         """
-        UsesNativeLibrary = namedtuple("UsesNativeLibrary", "name required")
         res = []
         for e in self.root.findall("application/uses-native-library"):
             name = self._getattr(e, "android:name")
@@ -77,12 +165,12 @@ class Parser:
             res.append(UsesNativeLibrary(name, required))
         return res
 
+    @memoized
     def usesFeatures(self):
         """
         Parses the hardware or software features used by the application.
         https://developer.android.com/guide/topics/manifest/uses-feature-element
         """
-        UsesFeature = namedtuple("UsesFeature", "name required")
         res = []
         for e in self.root.findall("uses-feature"):
             name = self._getattr(e, "android:name")
@@ -93,6 +181,7 @@ class Parser:
             res.append(UsesFeature(name, required))
         return res
 
+    @memoized
     def requiredPermissions(self):
         """
         Lists all the permissions requested by the application.
@@ -136,12 +225,12 @@ class Parser:
         """
         return str2Bool(self._getattr(self.root.find("application"), "android:usesCleartextTraffic"))
 
+    @memoized
     def customPermissions(self):
         """
         Lists all the custom permissions defined by the application.
         https://developer.android.com/guide/topics/manifest/permission-element
         """
-        CustomPerm = namedtuple("CustomPerm", "name protectionLevel")
         res = []
         for perm in self.root.findall('permission'):
             name = self._getattr(perm, "android:name")
@@ -149,6 +238,7 @@ class Parser:
             res.append(CustomPerm(name, protectionLevel))
         return res
 
+    @memoized
     def exportedComponents(self, component):
         """
         Lists all the exported components of a given type (activity, provider, ...).
@@ -164,17 +254,13 @@ class Parser:
         must explicitly declare whether they should be exported or not. Prior to Android 12, components (activities,
         services, and broadcast receivers only) with an intent-filter declared were automatically exported
         """
+        components = self.componentsByType.get(component, [])
         # check if there is android:exported property set to True (no matter intent filter)
-        exported_component = {self._getattr(e, "android:name") for e in
-                              self.root.findall(f'application/{component}[@android:exported="true"]',
-                                                namespaces=self.namespaces)}
+        exported_component = {c.name for c in components if c.exported == "true"}
         # check if there is an intent filter in component tag
-        intent_component = {self._getattr(e, "android:name") for e in
-                            self.root.findall(f'application/{component}/intent-filter/..', namespaces=self.namespaces)}
+        intent_component = {c.name for c in components if c.intentFilters}
         # check if there is android:exported property set to False (no matter intent filter)
-        unexported_component = {self._getattr(e, "android:name") for e in
-                                self.root.findall(f'application/{component}[@android:exported="false"]',
-                                                  namespaces=self.namespaces)}
+        unexported_component = {c.name for c in components if c.exported == "false"}
         # update components (if there is android:exported to False and intent-filter, component is not exported)
         exported_component.update(intent_component - unexported_component)
         return list(exported_component)
@@ -183,7 +269,7 @@ class Parser:
         """
         Counts the number of components of a given type (activity, provider, ...).
         """
-        return len(self.root.findall(f'application/{component}'))
+        return len(self.componentsByType.get(component, []))
 
     def exportedComponentStats(self, component):
         """
@@ -212,6 +298,7 @@ class Parser:
         """
         return self._getattr(self.root.find("application"), "android:networkSecurityConfig")
 
+    @memoized
     def getSdkVersion(self):
         """
         Returns the minimal and maximal SDK versions defined in the manifest.
@@ -231,6 +318,7 @@ class Parser:
             max_level = int(self._getattr(usesSdk, "android:maxSdkVersion") or 0)
         return min_level, target_level, max_level
 
+    @memoized
     def getExportedComponentPermission(self, componentType):
         """
         Lists all exported components of a given type (activity, provider, ...) and their permissions.
@@ -245,15 +333,13 @@ class Parser:
         However, the readPermission, writePermission, and grantUriPermissions (False by default) attributes
         take precedence over this one.
         """
-
-        # use a namedtuple for more readable access to important attributes
-        ExportedComponents = namedtuple("ExportedComponents",
-                                        "componentName componentType permission readPermission "
-                                        "writePermission grantUriPermissions")
         res = []
+        # first component of this type for each name, like a find() on the name would return
+        byName = {}
+        for c in self.componentsByType.get(componentType, []):
+            byName.setdefault(c.rawName, c.element)
         for name in self.exportedComponents(componentType):
-            component = self.root.find(f'application/{componentType}[@android:name="{name}"]',
-                                       namespaces=self.namespaces)
+            component = byName.get(name)
             permission = self._getattr(component, "android:permission")
             readPermission, writePermission, grantUriPermissions = None, None, None
             if componentType == "provider":
@@ -265,6 +351,7 @@ class Parser:
                                           grantUriPermissions))
         return res
 
+    @memoized
     def getUnexportedProviders(self):
         """
         Lists unexported providers with grantUriPermission set to True.
@@ -273,30 +360,27 @@ class Parser:
         https://blog.oversecured.com/Android-Access-to-app-protected-components/
         https://snyk.io/blog/exploring-android-intent-based-security-vulnerabilities-google-play/
         """
-        return {self._getattr(e, "android:name") for e in self.root.findall(
-            f'application/provider[@android:grantUriPermissions="true"][@android:exported="false"]',
-            namespaces=self.namespaces)}
+        return {c.name for c in self._componentsWithAttr("provider", "android:grantUriPermissions", "true")
+                if c.exported == "false"}
 
+    @memoized
     def getIntentFilterExportedComponents(self):
         """
         Returns a tuple (componentName, componentType) for each exported component having
         one or more intent_filter(s) (android:exported is true or none)
         """
-        all_intent = {(self._getattr(e, "android:name"), e.tag) for e in
-                      self.root.findall(f'application/*/intent-filter/..')}
-        not_exported = {(self._getattr(e, "android:name"), e.tag) for e in
-                        self.root.findall(f'application/*[@android:exported="false"]/intent-filter/..',
-                                          namespaces=self.namespaces)}
+        all_intent = {(c.name, c.tag) for c in self.intentFilterComponents}
+        not_exported = {(c.name, c.tag) for c in self.intentFilterComponents if c.exported == "false"}
         return all_intent - not_exported
 
+    @memoized
     def getIntentFilters(self, compname):
         """
         Returns a list containing intent_filters information (action, category, data_uris, mimetypes)
         from an Element with given name.
         """
         # get intent-filter element from a Element with given name
-        intents = self.root.findall(f"application/*[@android:name=\"{compname}\"]/intent-filter",
-                                    namespaces=self.namespaces)
+        intents = [i for c in self.componentsByName.get(compname, []) for i in c.intentFilters]
         res = []
         # each intent on a separated line
         for e in intents:
@@ -361,6 +445,7 @@ class Parser:
         # https://developer.android.com/guide/topics/manifest/data-element
         return ["".join(uri) for uri in product(schemes, hosts, port, path)]
 
+    @memoized
     def getUniversalLinks(self):
         """
         Returns a list containing Universal links (deep links and app links) information
@@ -371,14 +456,12 @@ class Parser:
         """
         # do not keep the tag
         exported_components = self.getIntentFilterExportedComponents()
-        # use a namedtuple for more readable access to important attributes
-        UniversalLink = namedtuple("UniversalLink", "name tag autoVerify uris hosts")
+        nameKey = self._attrKey("android:name")
         deepLinks = []
         for compname, tag in exported_components:
             # deep links must have ACTION_VIEW
-            intents = self.root.findall(f'application/*[@android:name=\"{compname}\"]/intent-filter/'
-                                        f'action[@android:name="android.intent.action.VIEW"]/..',
-                                        namespaces=self.namespaces)
+            intents = [i for c in self.componentsByName.get(compname, []) for i in c.intentFilters
+                       if any(a.attrib.get(nameKey) == "android.intent.action.VIEW" for a in i.findall("action"))]
             for i in intents:
                 # deep links must have category BROWSABLE
                 if i.find('category[@android:name="android.intent.category.BROWSABLE"]',
@@ -408,6 +491,10 @@ class Parser:
         # will be overridden in the APKParser class
         return []
 
+    def scanStrings(self, scanner):
+        # will be overridden in the APKParser class
+        return []
+
     def getNetworkSecurityConfigFile(self):
         # will be overridden in the APKParser class
         return None
@@ -423,48 +510,47 @@ class Parser:
             fullBackupOnly = False
         return fullBackupOnly
 
+    @memoized
     def getSingleTaskActivities(self):
         """
         Returns a list of activities whose launch mode is set to singleTask and taskAffinity to ""
         """
-        singleTask = self.root.findall(f'application/activity[@android:launchMode="singleTask"]',
-                                                    namespaces=self.namespaces)
-        
+        singleTask = self._componentsWithAttr("activity", "android:launchMode", "singleTask")
         # In some APK it is the enum value only singleTask=2
-        singleTask += self.root.findall(f'application/activity[@android:launchMode="2"]',
-                                                    namespaces=self.namespaces)
-        
-        singleTask_with_task_affinity = self.root.findall(f'application/activity[@android:taskAffinity=""]',
-                                                    namespaces=self.namespaces)
-        
-        single_task_activities = [self._getattr(e, "android:name").split(".")[-1] for e in
-                                  list(singleTask) if e not in singleTask_with_task_affinity]
-        
+        singleTask += self._componentsWithAttr("activity", "android:launchMode", "2")
+        # the elements are hashable, unlike the components holding the list of their intent filters
+        singleTask_with_task_affinity = {c.element for c in
+                                         self._componentsWithAttr("activity", "android:taskAffinity", "")}
+
+        single_task_activities = [c.name.split(".")[-1] for c in
+                                  singleTask if c.element not in singleTask_with_task_affinity]
+
         return single_task_activities
 
+    @memoized
     def getComponentCustomPerms(self, component):
         """
         Lists all components and their associated custom permission
         The list is returned as a namedtuple made of component's name and permission
         """
-        CustomPermsComponent = namedtuple("CustomPermsComponent", "name permission")
         res = []
-        for e in self.root.findall(f"application/{component}"):
-            name = self._getattr(e, "android:name")
-            permission = self._getattr(e, "android:permission")
+        for c in self.componentsByType.get(component, []):
+            name = c.name
+            permission = self._getattr(c.element, "android:permission")
             # only get custom permission(s) (android:permission prefix is only used for builtin ones)
             if permission is not None and not permission.startswith("android.permission"):
                 res.append(CustomPermsComponent(name, permission))
         return res
 
+    @memoized
     def getCustomPermsUsageError(self, component):
         """
         Lists all components which misuse custom permission (android:uses-permission instead of android:permission)
         """
-        return [self._getattr(e, "android:name") for e in
-                self.root.findall(f'application/{component}[@android:uses-permission]',
-                                  namespaces=self.namespaces)
-                if not self._getattr(e, "android:uses-permission").startswith("android.permission")]
+        usesPermission = self._attrKey("android:uses-permission")
+        return [c.name for c in self.componentsByType.get(component, [])
+                if usesPermission in c.element.attrib
+                and not self._getattr(c.element, "android:uses-permission").startswith("android.permission")]
     
     def isGlobalTaskAffinity(self):
         """
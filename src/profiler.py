@@ -0,0 +1,93 @@
+import contextlib
+import functools
+import inspect
+import threading
+import time
+
+
+class Profiler:
+    """
+    Records the wall time and the number of calls of the checks and of the parser queries.
+    The times are inclusive: a query calling another query is counted in both.
+    The checks run at the same time, so their times can add up to more than the duration of the analysis.
+    """
+
+    def __init__(self):
+        # section -> name -> [calls, time]
+        self.stats = {}
+        self.lock = threading.Lock()
+        # what the resource table of an APK cost (see APKParser.resourcesInfo), if it was loaded
+        self.resources = None
+
+    def record(self, section, name, duration):
+        with self.lock:
+            stats = self.stats.setdefault(section, {}).setdefault(name, [0, 0.0])
+            stats[0] += 1
+            stats[1] += duration
+
+    @contextlib.contextmanager
+    def measure(self, section, name):
+        """
+        Records the time spent in a with block.
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(section, name, time.perf_counter() - start)
+
+    def _wrap(self, section, name, func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with self.measure(section, name):
+                return func(*args, **kwargs)
+        return wrapper
+
+    def instrument(self, obj, private=()):
+        """
+        Measures the public methods of an object, and the given private ones.
+        Only this instance is modified, the other instances of its class are not slowed down.
+        Returns the object.
+        """
+        cls = type(obj)
+        for name, member in inspect.getmembers(cls, inspect.isfunction):
+            if not name.startswith("_") or name in private:
+                setattr(obj, name, self._wrap("parser", f"{cls.__name__}.{name}", getattr(obj, name)))
+        return obj
+
+    def toDict(self):
+        """
+        Returns the statistics in a JSON serializable form, by section then by name,
+        and what the resource table cost in "resource table".
+        """
+        with self.lock:
+            res = {section: {name: {"calls": calls, "time": duration}
+                             for name, (calls, duration) in sorted(stats.items())}
+                   for section, stats in sorted(self.stats.items())}
+        if self.resources is not None:
+            res["resource table"] = self.resources
+        return res
+
+    def show(self):
+        """
+        Displays a table per section, the most expensive first.
+        """
+        from tabulate import tabulate
+        stats = self.toDict()
+        resources = stats.pop("resource table", None)
+        for section, stats in stats.items():
+            table = [[name, e["calls"], f"{e['time'] * 1000:.2f}"]
+                     for name, e in sorted(stats.items(), key=lambda e: -e[1]["time"])]
+            print(tabulate(table, [section, "calls", "time (ms)"]))
+            print()
+        if resources is not None:
+            memory = resources["memory"]
+            print(tabulate([[resources["size"], resources["cached"], f"{resources['time'] * 1000:.2f}",
+                             "" if memory is None else memory]],
+                           ["resource table (bytes)", "cached", "time (ms)", "memory (bytes)"]))
+            print()
+            table = [[name, e["hits"], e["misses"], f"{e['rate']:.1%}"]
+                     for name, e in sorted(resources.get("cache", {}).items())]
+            if table:
+                print(tabulate(table, ["resource lookups", "hits", "misses", "hit rate"]))
+                print()
@@ -0,0 +1,36 @@
+from collections import namedtuple
+
+# Record types returned by the parsers.
+# They are defined once here instead of creating a new namedtuple class at every call.
+# namedtuples have no per-instance __dict__, so the records stay as compact as plain tuples.
+
+# Parser
+# an entry of the component index built by Parser._indexComponents
+# rawName and exported are the attribute values as written in the manifest
+Component = namedtuple("Component", "element tag name rawName exported intentFilters")
+Info = namedtuple("Info", "package versionCode versionName")
+UsesLibrary = namedtuple("UsesLibrary", "name required")
+UsesNativeLibrary = namedtuple("UsesNativeLibrary", "name required")
+UsesFeature = namedtuple("UsesFeature", "name required")
+CustomPerm = namedtuple("CustomPerm", "name protectionLevel")
+ExportedComponents = namedtuple("ExportedComponents", "componentName componentType permission readPermission "
+                                                      "writePermission grantUriPermissions")
+UniversalLink = namedtuple("UniversalLink", "name tag autoVerify uris hosts")
+CustomPermsComponent = namedtuple("CustomPermsComponent", "name permission")
+
+# APKParser
+# requireFlags is only for type "include"
+Rule = namedtuple("Rule", "type domain path requireFlags")
+# disableIfNoEncryptionCapabilities is only for <cloud-Backup>
+ExtractionRules = namedtuple("ExtractionRules", "cloudBackupRules disableIfNoEncryptionCapabilities "
+                                                "deviceTransferRules")
+# pattern is the id of the pattern found in string, match is the matching text
+StringMatch = namedtuple("StringMatch", "pattern string match")
+
+# NetworkSecParser
+Cert = namedtuple("Cert", "src overridePins")
+BConfig = namedtuple("BConfig", "cleartextTrafficPermitted trustanchors")
+DConfig = namedtuple("DConfig", "cleartextTrafficPermitted domains trustanchors pinset domainConfigs")
+DomainTrustAnchors = namedtuple("DomainTrustAnchors", "domain trustanchors")
+DomainPinSet = namedtuple("DomainPinSet", "domain pinset")
+DomainPinning = namedtuple("DomainPinning", "domain pinset overridePins")
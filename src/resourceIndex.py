@@ -0,0 +1,147 @@
+from .utils import memoized
+import threading
+
+
+class ResourceIndex:
+    """
+    Resolution cache over the ARSCParser of an APK.
+    pyaxmlparser answers get_id and get_string by scanning the whole resource table every time.
+    Here each table is scanned once, on first use, into a reverse index,
+    and every resolved resource is memoized so repeated lookups are dict accesses.
+
+    The index of the default package can be exported with toDict and loaded back without the resource table
+    with fromDict. Then only the paths of the xml resources are known.
+    """
+
+    def __init__(self, rsc):
+        self.rsc = rsc
+        # I don't know how to handle the case when there are multiple package names yet
+        self.packageName = rsc.get_packages_names()[0] if rsc is not None else None
+        # package name -> {rid: (type, name)} and {name: string}, built on first use
+        self.ids = {}
+        self.strings = {}
+        # (type, name) -> real path, only when loaded with fromDict
+        self.paths = {}
+        # values of the string resources of the default package, built on first use
+        self.values = None
+        # the ARSCParser is not thread safe
+        self.lock = threading.RLock()
+
+    def toDict(self):
+        """
+        Exports the indexes of the default package in a JSON serializable form.
+        """
+        return {
+            "package": self.packageName,
+            "ids": [[rid, resType, name] for rid, (resType, name) in self._idIndex(self.packageName).items()],
+            "strings": self._stringIndex(self.packageName),
+            "xml": {name: self._realPath("xml", name, self.packageName)
+                    for name in self.rsc.resource_keys[self.packageName].get("xml", {})},
+            "values": self.getStringValues()
+        }
+
+    @classmethod
+    def fromDict(cls, data):
+        """
+        Creates an index from the output of toDict.
+        """
+        res = cls(None)
+        res.packageName = data["package"]
+        res.ids[res.packageName] = {rid: (resType, name) for rid, resType, name in data["ids"]}
+        res.strings[res.packageName] = data["strings"]
+        res.paths = {("xml", name): path for name, path in data["xml"].items()}
+        res.values = data["values"]
+        return res
+
+    def _defaultValues(self, package_name):
+        # same table as get_id and get_string (default locale)
+        with self.lock:
+            self.rsc._analyse()
+        return self.rsc.values.get(package_name, {}).get("\x00\x00", {})
+
+    def _idIndex(self, package_name):
+        index = self.ids.get(package_name)
+        if index is None and self.rsc is None:
+            # loaded with fromDict, only the default package is known
+            return {}
+        if index is None:
+            index = {}
+            for resType, name, rid in self._defaultValues(package_name).get("public", []):
+                # get_id returns the first match
+                index.setdefault(rid, (resType, name))
+            # only published once complete, for the other threads
+            self.ids[package_name] = index
+        return index
+
+    def _stringIndex(self, package_name):
+        index = self.strings.get(package_name)
+        if index is None and self.rsc is None:
+            return {}
+        if index is None:
+            index = {}
+            for name, string in self._defaultValues(package_name).get("string", []):
+                # get_string returns the first match
+                index.setdefault(name, string)
+            self.strings[package_name] = index
+        return index
+
+    @memoized
+    def getId(self, rid, package_name=None):
+        """
+        Returns the (type, name) of a resource ID, or (None, None) if it is unknown.
+        """
+        return self._idIndex(package_name or self.packageName).get(rid, (None, None))
+
+    @memoized
+    def getString(self, name, package_name=None):
+        """
+        Returns the value of a string resource, or None if it is unknown.
+        """
+        return self._stringIndex(package_name or self.packageName).get(name)
+
+    @memoized
+    def getRealPath(self, resType, name, package_name=None):
+        """
+        Returns the path in the ZIP archive of the resource with given type and name, or None if it is unknown.
+        """
+        if self.rsc is None:
+            return self.paths.get((resType, name))
+        return self._realPath(resType, name, package_name or self.packageName)
+
+    def _realPath(self, resType, name, package_name):
+        with self.lock:
+            # resource_keys is only filled by the analysis
+            self.rsc._analyse()
+        rid = self.rsc.resource_keys[package_name][resType].get(name)
+        if rid is None:
+            return
+        # get_res_configs returns a list of tuples
+        # we only care about the first element of this list
+        # and the second element of the tuple is a ARSCResTableEntry
+        # https://github.com/appknox/pyaxmlparser/blob/d111a4fc6330a0c293ffc2f114af360eb78ad2ef/pyaxmlparser/arscutil.py#L509
+        # the key attribute holds a ARSCResStringPoolRef
+        # https://github.com/appknox/pyaxmlparser/blob/d111a4fc6330a0c293ffc2f114af360eb78ad2ef/pyaxmlparser/arscutil.py#L580
+        # the get_data_value function gives us what we are looking for
+        with self.lock:
+            return self.rsc.get_res_configs(rid)[0][1].key.get_data_value()
+
+    def getStringValues(self):
+        """
+        Lists the resolved values of all the string resources of the default package.
+        """
+        with self.lock:
+            if self.values is None:
+                # get_resolved_strings does not recompute all the strings every time, so it's fine
+                self.values = [s for s in self.rsc.get_resolved_strings()[self.packageName]["DEFAULT"].values()
+                               if s is not None]
+        return self.values
+
+    def cacheInfo(self):
+        """
+        Returns the hit and miss counters of each kind of lookup, with their hit rate.
+        """
+        stats = {}
+        for name, e in getattr(self, "cacheStats", {}).items():
+            total = e["hits"] + e["misses"]
+            stats[name] = dict(e, rate=e["hits"] / total if total else 0.0)
+        return stats
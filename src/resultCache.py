@@ -0,0 +1,226 @@
+from .config import (
+    RESULT_CACHE_PATH, RESULT_CACHE_MAX_SIZE,
+    DECODED_CACHE_PATH, DECODED_CACHE_MAX_SIZE,
+    ASSET_LINKS_CACHE_PATH, ASSET_LINKS_CACHE_MAX_SIZE, ASSET_LINKS_CACHE_TTL
+)
+from .checks import selectChecks
+import functools
+import hashlib
+import json
+import gzip
+import os
+import tempfile
+import time
+
+CHUNK_SIZE = 1024 * 1024
+# sections of the JSON results filled by the checks sending requests over the network (see checks.NETWORK)
+NETWORK_RESULTS = ["App links"]
+
+
+def fileHash(path):
+    """
+    Computes the SHA-256 of a file without loading it all in memory.
+    """
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(CHUNK_SIZE), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def _fingerprint(names):
+    """
+    Hashes the given source files of this package.
+    """
+    h = hashlib.sha256()
+    src = os.path.dirname(os.path.abspath(__file__))
+    for name in sorted(names):
+        with open(os.path.join(src, name), "rb") as f:
+            h.update(name.encode() + b"\0" + f.read())
+    return h.hexdigest()
+
+
+@functools.lru_cache(maxsize=None)
+def toolVersion():
+    """
+    Fingerprint of the analysis code.
+    Any change of the checks or of the parsers changes it, so results computed by another version are never reused.
+    """
+    src = os.path.dirname(os.path.abspath(__file__))
+    return _fingerprint([name for name in os.listdir(src) if name.endswith(".py")])
+
+
+@functools.lru_cache(maxsize=None)
+def decoderVersion():
+    """
+    Fingerprint of the code decoding the binary files of an APK.
+    Unlike toolVersion, it does not change when the checks are updated.
+    """
+    from importlib import metadata
+    try:
+        pyaxmlparserVersion = metadata.version("pyaxmlparser")
+    except metadata.PackageNotFoundError:
+        pyaxmlparserVersion = ""
+    return f"{_fingerprint(['apkParser.py', 'axmlBuilder.py', 'resourceIndex.py'])}:{pyaxmlparserVersion}"
+
+
+class ResultCache:
+    """
+    On-disk cache of the JSON results of the analysis.
+    The results are addressed by the content of the analyzed file, the SDK versions and the version of the tool.
+    Each result is stored in its own file, whose modification time is updated when it is read.
+    When the cache grows over maxSize bytes, the least recently used results are removed.
+    """
+    suffix = ".json"
+
+    def __init__(self, path=RESULT_CACHE_PATH, maxSize=RESULT_CACHE_MAX_SIZE):
+        self.path = path
+        self.maxSize = maxSize
+
+    def key(self, path, args):
+        """
+        Computes the key of the results of a file analyzed with the given arguments (SDK versions and checks).
+        """
+        # the selected checks change the content of the results
+        checks = [c.name for c in selectChecks(getattr(args, "only", None), getattr(args, "skip", None))]
+        data = f"{fileHash(path)}:{args.min_sdk_version}:{args.target_sdk_version}:{args.max_sdk_version}:" \
+               f"{','.join(checks)}:{toolVersion()}"
+        return hashlib.sha256(data.encode()).hexdigest()
+
+    def getResults(self, key):
+        """
+        Returns the cached JSON results of an analysis or None.
+        The results depending on the network expire like the verifications of the app links they contain.
+        """
+        entry = self.get(key)
+        if entry is None or entry["expires"] is not None and time.time() > entry["expires"]:
+            return
+        return entry["results"]
+
+    def putResults(self, key, results):
+        """
+        Stores the JSON results of an analysis.
+        """
+        network = any(results.get(section) for section in NETWORK_RESULTS)
+        self.put(key, {"results": results, "expires": time.time() + ASSET_LINKS_CACHE_TTL if network else None})
+
+    def _entry(self, key):
+        return os.path.join(self.path, f"{key}{self.suffix}")
+
+    def _load(self, entry):
+        with open(entry) as f:
+            return json.load(f)
+
+    def _dump(self, fd, result):
+        with os.fdopen(fd, "w") as f:
+            json.dump(result, f)
+
+    def get(self, key):
+        """
+        Returns the cached results or None.
+        """
+        entry = self._entry(key)
+        try:
+            res = self._load(entry)
+            # mark as recently used
+            os.utime(entry)
+        except (OSError, EOFError, ValueError):
+            # a corrupted entry is the same as a missing one
+            return
+        return res
+
+    def put(self, key, result):
+        """
+        Stores results then evicts the least recently used ones if the cache is too big.
+        """
+        os.makedirs(self.path, exist_ok=True)
+        # write then rename so concurrent readers never see a partial file
+        fd, tmp = tempfile.mkstemp(dir=self.path, suffix=".tmp")
+        self._dump(fd, result)
+        os.replace(tmp, self._entry(key))
+        self.evict()
+
+    def evict(self):
+        """
+        Removes the least recently used results until the cache fits in maxSize bytes.
+        """
+        entries = []
+        with os.scandir(self.path) as it:
+            for e in it:
+                if e.name.endswith(self.suffix):
+                    try:
+                        st = e.stat()
+                    except FileNotFoundError:
+                        # removed by another process
+                        continue
+                    entries.append((st.st_mtime, st.st_size, e.path))
+        size = sum(e[1] for e in entries)
+        for _, entrySize, path in sorted(entries):
+            if size <= self.maxSize:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            size -= entrySize
+
+
+class DecodedCache(ResultCache):
+    """
+    On-disk cache of the decoded content of APK files: XML files and resource tables.
+    The entries are addressed by the SHA-256 of the files they were decoded from, so they are reused whatever
+    the analysis arguments, and stored compressed.
+    The CRC declared in the ZIP file can't be trusted: an APK could copy it to get the decoded files of another one.
+    """
+    suffix = ".json.gz"
+
+    def __init__(self, path=DECODED_CACHE_PATH, maxSize=DECODED_CACHE_MAX_SIZE):
+        super().__init__(path, maxSize)
+
+    def key(self, kind, *digests):
+        """
+        Computes the key of some content decoded from the given files, given by the SHA-256 of their content
+        (see fileDigest, None for a missing file).
+        """
+        data = ":".join([kind, decoderVersion()] + ["-" if e is None else e for e in digests])
+        return hashlib.sha256(data.encode()).hexdigest()
+
+    def _load(self, entry):
+        with gzip.open(entry, "rt") as f:
+            return json.load(f)
+
+    def _dump(self, fd, result):
+        with os.fdopen(fd, "wb") as raw, gzip.open(raw, "wt") as f:
+            json.dump(result, f, separators=(",", ":"))
+
+
+class AssetLinksCache(ResultCache):
+    """
+    On-disk cache of the Digital Asset Links verifications, addressed by the URL of the file.
+    The files can be published or removed at any time so the entries expire after ttl seconds.
+    """
+
+    def __init__(self, path=ASSET_LINKS_CACHE_PATH, maxSize=ASSET_LINKS_CACHE_MAX_SIZE, ttl=ASSET_LINKS_CACHE_TTL):
+        super().__init__(path, maxSize)
+        self.ttl = ttl
+
+    def key(self, url):
+        """
+        Computes the key of the verification of a URL.
+        """
+        return hashlib.sha256(url.encode()).hexdigest()
+
+    def get(self, key):
+        """
+        Returns True if the file was found, False if it was not, or None if the result is unknown or expired.
+        """
+        res = super().get(key)
+        if res is None or time.time() - res["time"] > self.ttl:
+            return
+        return res["active"]
+
+    def put(self, key, active):
+        """
+        Stores the result of a verification.
+        """
+        super().put(key, {"time": time.time(), "active": active})
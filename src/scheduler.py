@@ -0,0 +1,122 @@
+from concurrent.futures import ThreadPoolExecutor
+import contextlib
+import functools
+import threading
+import logging
+import sys
+
+# output of the task running in the current thread, if it is recorded
+_local = threading.local()
+
+
+def display(func, *args):
+    """
+    Calls func(*args) to display something, or records the call if the current task is recorded,
+    so it is made once the previous tasks are displayed. The Console displays everything through it.
+    """
+    records = getattr(_local, "records", None)
+    if records is None:
+        return func(*args)
+    records.append(functools.partial(func, *args))
+
+
+class _RecordFilter(logging.Filter):
+    """
+    Keeps the messages logged by the recorded tasks instead of emitting them, they are handled again when
+    their task is replayed. Threads without a record list log as usual.
+    """
+
+    def __init__(self, logger):
+        super().__init__()
+        self.logger = logger
+
+    def filter(self, record):
+        records = getattr(_local, "records", None)
+        if records is None:
+            return True
+        records.append(functools.partial(self.logger.handle, record))
+        return False
+
+
+@contextlib.contextmanager
+def _recordOutput(logger):
+    """
+    Records the messages of the logger while the tasks run.
+    The streams are left untouched: the other threads of the process write and log as usual.
+    """
+    recordFilter = _RecordFilter(logger)
+    logger.addFilter(recordFilter)
+    try:
+        yield
+    finally:
+        logger.removeFilter(recordFilter)
+
+
+def _recorded(task):
+    """
+    Runs a task in a worker thread and returns what it displayed, its result and the exception it raised.
+    """
+    _local.records = records = []
+    try:
+        return records, task(), None
+    except BaseException as e:
+        return records, None, e
+    finally:
+        del _local.records
+
+
+def _unrecorded(task):
+    """
+    Same as _recorded without recording anything.
+    """
+    try:
+        return [], task(), None
+    except BaseException as e:
+        return [], None, e
+
+
+def _replay(records):
+    for call in records:
+        call()
+    if records:
+        sys.stdout.flush()
+
+
+def runInOrder(tasks, threads=1, logger=logging.getLogger("MainLogger"), record=True, interactive=()):
+    """
+    Runs tasks (functions without arguments) at the same time on a pool of threads and yields their results.
+    What each task displays (see display) and logs with the logger is recorded while it runs, then displayed once
+    all the previous tasks are done, so the output and the results come in the order of the tasks, as if they
+    were run one after the other.
+    If a task raises an exception, it is raised after its output is written and the tasks not started yet
+    are cancelled.
+    With a single thread, the tasks are simply run in sequence.
+    If record is False the output is not put in order. For the tasks which do not display anything, so several
+    analyses can run on the threads of a service.
+
+    :param interactive: the indexes of the tasks waiting for the user, they are run on the calling thread when
+                        their turn comes and their output is displayed as they go
+    """
+    if threads <= 1:
+        for task in tasks:
+            yield task()
+        return
+    with _recordOutput(logger) if record else contextlib.nullcontext(), \
+            ThreadPoolExecutor(max_workers=threads) as executor:
+        futures = [None if i in interactive else executor.submit(_recorded if record else _unrecorded, task)
+                   for i, task in enumerate(tasks)]
+        try:
+            for task, future in zip(tasks, futures):
+                if future is None:
+                    # the output of the previous tasks is already displayed
+                    yield task()
+                    continue
+                records, res, exc = future.result()
+                _replay(records)
+                if exc is not None:
+                    raise exc
+                yield res
+        finally:
+            for future in futures:
+                if future is not None:
+                    future.cancel()
@@ -0,0 +1,38 @@
+import re
+from .records import StringMatch
+
+
+class StringScanner:
+    """
+    Looks for a whole set of patterns in a single pass.
+    The patterns are compiled into one alternation of named groups, so each string is only searched once
+    whatever the number of patterns, and the name of the group that matched gives the pattern id.
+    Matches are leftmost and do not overlap: when two patterns match at the same position, the first one wins.
+    """
+
+    def __init__(self, patterns, flags=0):
+        """
+        :param patterns: a {pattern id: regex} dict
+        :param flags: the flags of the whole alternation, a single pattern can ignore the case with (?i:...)
+        """
+        # group names must be identifiers, so they are mapped back to the pattern ids
+        self.ids = {f"p{i}": pid for i, pid in enumerate(patterns)}
+        self.regex = re.compile("|".join(f"(?P<p{i}>{p})" for i, p in enumerate(patterns.values())), flags)
+
+    def scan(self, strings):
+        """
+        Searches all the patterns in each string.
+        Returns a StringMatch for each (pattern, string) pair, with the first matching text.
+        The results are in the order of the strings.
+        """
+        res = []
+        for s in strings:
+            if not s:
+                continue
+            found = set()
+            for m in self.regex.finditer(s):
+                pid = self.ids[m.lastgroup]
+                if pid not in found:
+                    found.add(pid)
+                    res.append(StringMatch(pid, s, m.group()))
+        return res
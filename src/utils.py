@@ -2,7 +2,14 @@
 
 from termcolor import *
 import logging
-import requests
+import functools
+import xml.etree.ElementTree as ET
+import re
+import io
+import json
+
+# formatting added by termcolor
+ANSI_CODES_PATTERN = re.compile(r"\x1b\[[\d;]*m")
 
 
 class CustomFormatter(logging.Formatter):
@@ -21,6 +28,98 @@ class CustomFormatter(logging.Formatter):
         return super(CustomFormatter, self).format(record)
 
 
+def memoized(func):
+    """
+    Caches the result of a parser query on the parser instance, keyed by the query name and its arguments.
+    The result is computed once per parsed document. Parser.clearCache() invalidates everything.
+    Hits and misses are counted per query in the cacheStats attribute of the instance.
+    Cached results are shared between callers so they must not be modified.
+    """
+    @functools.wraps(func)
+    def wrapper(self, *args, **kwargs):
+        # setdefault on __dict__ so it also works for instances created without calling __init__
+        cache = self.__dict__.setdefault("_cache", {})
+        stats = self.__dict__.setdefault("cacheStats", {}).setdefault(func.__name__, {"hits": 0, "misses": 0})
+        key = (func.__name__, args, tuple(sorted(kwargs.items())))
+        if key in cache:
+            stats["hits"] += 1
+            return cache[key]
+        stats["misses"] += 1
+        res = cache[key] = func(self, *args, **kwargs)
+        return res
+    return wrapper
+
+
+def parseXML(source):
+    """
+    Parses an XML document (path or file object) in a single pass.
+    The tree is built while the namespace declarations are collected, so the document is only tokenized once.
+    Returns the ElementTree and the namespaces as a {prefix: uri} dict.
+    """
+    namespaces = {}
+    events = ET.iterparse(source, events=["start-ns"])
+    for _, (prefix, uri) in events:
+        namespaces[prefix] = uri
+    return ET.ElementTree(events.root), namespaces
+
+
+class BufferStream(io.RawIOBase):
+    """
+    Read-only seekable stream over a buffer (bytearray, memoryview, mmap...).
+    The buffer is not copied, only the parts which are read.
+    """
+
+    def __init__(self, buffer):
+        self.view = memoryview(buffer).cast("B")
+        self.pos = 0
+
+    def readable(self):
+        return True
+
+    def seekable(self):
+        return True
+
+    def tell(self):
+        return self.pos
+
+    def seek(self, offset, whence=io.SEEK_SET):
+        start = {io.SEEK_SET: 0, io.SEEK_CUR: self.pos, io.SEEK_END: len(self.view)}[whence]
+        self.pos = max(0, start + offset)
+        return self.pos
+
+    def read(self, size=-1):
+        end = len(self.view) if size is None or size < 0 else min(self.pos + size, len(self.view))
+        data = self.view[self.pos:end].tobytes()
+        self.pos = max(self.pos, end)
+        return data
+
+    def readall(self):
+        return self.read()
+
+    def close(self):
+        super().close()
+        # the buffer is not exported anymore
+        self.view.release()
+
+    def readinto(self, b):
+        data = self.read(len(b))
+        b[:len(data)] = data
+        return len(data)
+
+
+def toStream(source):
+    """
+    Returns a seekable binary stream over bytes, bytearray or memoryview, without copying them.
+    Paths and file objects are returned as they are.
+    """
+    if isinstance(source, bytes):
+        # BytesIO shares the bytes as long as nothing is written
+        return io.BytesIO(source)
+    if isinstance(source, (bytearray, memoryview)):
+        return BufferStream(source)
+    return source
+
+
 def str2Bool(s):
     """
     Associates true or false string with their corresponding boolean
@@ -65,17 +164,6 @@ def printSubTestInfo(title):
     print(colored(f"\n[+] {title}", "cyan"))
 
 
-def checkDigitalAssetLinks(host):
-    """
-    Checks if Digital Asset Link JSON file is publicly available
-    """
-    try:
-        if requests.get(f'https://{host}/.well-known/assetlinks.json').status_code == 200:
-            return True
-    except (requests.exceptions.ConnectionError, requests.exceptions.InvalidURL):
-        return False
-
-
 def formatResource(path, name):
     """
     Formats a file name by adding an underline.
@@ -98,7 +186,40 @@ def unformatFilename(name):
     """
     if name is None:
         return
-    return name[4:-4]
+    # termcolor does not add the codes when the output is not a terminal
+    return ANSI_CODES_PATTERN.sub("", name)
+
+
+def writeJSON(path, result):
+    """
+    Exports the results of the analysis in JSON format to a file.
+    """
+    with open(path, "w") as f:
+        json.dump(result, f)
+        f.write("\n")
+
+
+class JSONLinesSink:
+    """
+    Appends records to a JSON Lines file, one compact JSON document per line.
+    Each record is flushed as soon as it is written so the file can be tailed while the analysis runs.
+    """
+
+    def __init__(self, path):
+        self.file = open(path, "a")
+
+    def write(self, record):
+        self.file.write(json.dumps(record, separators=(",", ":")) + "\n")
+        self.file.flush()
+
+    def close(self):
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
 
 
 def runProc(*args, **kwargs):
@@ -118,10 +239,8 @@ def runProc(*args, **kwargs):
     output_stderr = None
     try:
         p = subprocess.Popen(stdout=subprocess.PIPE, stderr=subprocess.PIPE, *args, **kwargs)
-        p.wait()
-        output = p.stdout.read()
-        output_stderr = p.stderr.read()
-        p.stdout.close()
+        # reads while the process runs, it would block on a full pipe otherwise (adb exec-out of an APK)
+        output, output_stderr = p.communicate()
     finally:
         if p is not None and p.poll() is None:
             p.terminate()  # send sigterm, or ...